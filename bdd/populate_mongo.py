@@ -3,9 +3,9 @@ import csv
 import sys
 import unicodedata
 from collections import Counter
-from typing import Dict, Iterator, List, Optional, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Any
 
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
 from dotenv import load_dotenv
 from difflib import SequenceMatcher
@@ -20,6 +20,8 @@ DB_NAME = os.getenv("DB_NAME", "miskatonic")
 COLLECTION_NAME = os.getenv("COLLECTION_NAME", "questions")
 BATCH_SIZE = int(os.getenv("BATCH_SIZE", "1000"))
 CSV_SOURCE = os.getenv("CSV_SOURCE", "./questions.csv")
+# Compteurs par sujet / usage et par statut tenus par l'API (voir QuestionRepository)
+FACETS_COLLECTION = "facets"
 
 SUBJECT_FIX_ENABLED = os.getenv("SUBJECT_FIX_ENABLED", "true")
 SUBJECT_SEUIL = float(os.getenv("SUBJECT_SEUIL", "0.90"))
@@ -159,17 +161,21 @@ def merge_responses_and_corrects(
 
 # --- Lecture CSV + nettoyage + correction des subjects ---
 def read_csv_rows(
-    file_path: str, fix_subjects: bool = True, subject_seuil: float = 0.90
+    file_path: str,
+    fix_subjects: bool = True,
+    subject_seuil: float = 0.90,
+    known_subjects: Optional[Iterable[str]] = None,
 ) -> Iterator[dict]:
     """
     Lecture CSV avec nettoyage:
     - supprime espaces en trop
     - 'correct' -> normalisation
-    - 'subject' -> rapprochement /correction typo
+    - 'subject' -> rapprochement /correction typo (y compris vers known_subjects,
+      les sujets déjà en base)
     - déduplication des questions identiques
     - restructuration responseA/B/C/D -> liste "responses"
     """
-    subjects_count: Dict[str, int] = {}
+    subjects_count: Dict[str, int] = {s: 0 for s in known_subjects or [] if s}
     questions_cache: Dict[str, dict] = {}  # Cache pour détecter les doublons
 
     with open(file_path, "r", encoding="utf-8", newline="") as file:
@@ -292,14 +298,56 @@ def make_mongo_client() -> MongoClient:
     return MongoClient(uri, serverSelectionTimeoutMS=8000)
 
 
+# --- Facettes ---
+def count_facet_entries(documents: Iterable[dict], counts: Counter) -> None:
+    """
+    Ajoute à counts les contributions des documents aux facettes :
+    (kind, valeur, statut) -> nombre de questions.
+    """
+    for doc in documents:
+        status = doc.get("status") or "draft"
+        for kind in ("subject", "use"):
+            for value in set(doc.get(kind) or []):
+                if isinstance(value, str) and value:
+                    counts[(kind, value, status)] += 1
+
+
+def apply_facet_counts(facets_collection, counts: Counter) -> None:
+    """
+    Incrémente les facettes (mêmes documents que l'API) des questions insérées.
+    """
+    operations = [
+        UpdateOne(
+            {"_id": f"{kind}:{value}"},
+            {
+                "$inc": {f"counts.{status}": n, "total": n},
+                "$setOnInsert": {
+                    "kind": kind,
+                    "value": value,
+                    "value_norm": normalize_text(value),
+                },
+            },
+            upsert=True,
+        )
+        for (kind, value, status), n in counts.items()
+    ]
+    if operations:
+        facets_collection.bulk_write(operations, ordered=False)
+
+
 # --- Insertions par lots ---
-def insert_documents(collection, documents: Iterator[dict]) -> int:
+def insert_documents(
+    collection, documents: Iterator[dict], facet_counts: Optional[Counter] = None
+) -> int:
     """
     Insère les documents par lots.
+    Les contributions des documents insérés aux facettes sont ajoutées à facet_counts.
     Retourne le nombre total inséré.
     """
     batch = []
     total_inserted = 0
+    if facet_counts is None:
+        facet_counts = Counter()
 
     def flush_batch():
         nonlocal batch, total_inserted
@@ -308,9 +356,14 @@ def insert_documents(collection, documents: Iterator[dict]) -> int:
         try:
             result = collection.insert_many(batch, ordered=False)
             total_inserted += len(result.inserted_ids)
+            count_facet_entries(batch, facet_counts)
         except BulkWriteError as bwe:
             ok = bwe.details.get("nInserted", 0)
             total_inserted += ok
+            failed = {err.get("index") for err in bwe.details.get("writeErrors", [])}
+            count_facet_entries(
+                (doc for i, doc in enumerate(batch) if i not in failed), facet_counts
+            )
             print(
                 f"BulkWriteError: {ok} insérés avant erreur, détails resumés: {bwe.details.get('writeErrors', [])[:3]}"
             )
@@ -343,13 +396,20 @@ def populate_mongo():
         db = client[DB_NAME]
         collection = db[COLLECTION_NAME]
 
+        # Sujets déjà présents : les imports successifs convergent vers eux
+        known_subjects = collection.distinct("subject") if SUBJECT_FIX_ENABLED else []
+
         documents = read_csv_rows(
             CSV_SOURCE,
             fix_subjects=SUBJECT_FIX_ENABLED,
             subject_seuil=SUBJECT_SEUIL,
+            known_subjects=known_subjects,
         )
 
-        total = insert_documents(collection, documents)
+        facet_counts: Counter = Counter()
+        total = insert_documents(collection, documents, facet_counts)
+        # Les compteurs de facettes de l'API suivent l'import
+        apply_facet_counts(db[FACETS_COLLECTION], facet_counts)
         print(f"Terminé. {total} documents insérés.")
 
     except FileNotFoundError:
@@ -1,5 +1,5 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
@@ -10,44 +10,64 @@ from routers import questions
 from routers import auth
 from routers import questionnaires
 from utils.mg_database import database
+from utils.mg_executor import mongo_executor
+from utils.auth_dependencies import require_admin, token_cache
+from utils.password_hasher import password_hasher
+from utils.sq_database import Connection
+from utils.response_cache import question_responses, questionnaire_responses
+from services.question_service import QuestionService
+from services.questionnaire_service import QuestionnaireService
 
 
 class QuizAPI:
     """
     Classe principale de l'application Quiz API.
-    Adaptée pour utiliser pymongo (synchrone) avec FastAPI (asynchrone).
+    Utilise pymongo avec FastAPI (asynchrone), en pilote synchrone ou asynchrone.
     """
 
     def __init__(self):
         self.app = None
 
-    def startup(self):
+    async def startup(self):
         """
-        Initialisation de l'application au démarrage (version synchrone).
+        Initialisation de l'application au démarrage.
+        Le client pymongo synchrone crée collections et index ; le client
+        asynchrone n'est ouvert que si MONGO_DRIVER=async.
         """
         print("Démarrage de l'application...")
         database.init_db()
-        print("Application initialisée")
+        mongo_executor.init_executor(database.get_max_pool_size())
+        await database.init_async_db()
+        question_service = QuestionService()
+        try:
+            await question_service.backfill_subject_search_fields()
+            await question_service.ensure_facets()
+        except Exception as e:
+            print(f"Préparation des données dérivées impossible: {e}")
+        print(f"Application initialisée (pilote MongoDB: {database.get_driver()})")
 
-    def shutdown(self):
+    async def shutdown(self):
         """
-        Nettoyage de l'application à l'arrêt (version synchrone).
+        Nettoyage de l'application à l'arrêt.
         """
         print("Arrêt de l'application...")
+        await database.close_async_db()
+        mongo_executor.shutdown_executor()
         database.close_db()
+        Connection.close_pool()
+        password_hasher.shutdown()
         print("Application fermée")
 
     @asynccontextmanager
     async def lifespan(self, app: FastAPI):
         """
         Gestionnaire du cycle de vie de l'application.
-        Utilise des fonctions synchrones dans un contexte async.
         """
         try:
-            self.startup()
+            await self.startup()
             yield
         finally:
-            self.shutdown()
+            await self.shutdown()
 
     def create_app(self) -> FastAPI:
         """
@@ -70,6 +90,7 @@ class QuizAPI:
             allow_credentials=True,
             allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
             allow_headers=["*"],
+            expose_headers=["X-Next-After", "X-Next-Offset", "ETag"],
         )
 
         self._setup_exception_handlers(app)
@@ -126,6 +147,27 @@ class QuizAPI:
                 "status": "active",
                 "docs": "/docs",
                 "database": "pymongo",
+                "driver": database.get_driver(),
+            }
+
+        @app.get(
+            "/system/metrics",
+            summary="Métriques internes de l'API (administrateurs)",
+            tags=["Système"],
+            dependencies=[Depends(require_admin)],
+        )
+        async def metrics() -> Dict[str, Any]:
+            return {
+                "executor": mongo_executor.get_stats(),
+                "distinct_cache": QuestionService.get_cache_stats(),
+                "response_cache": {
+                    "question": question_responses.get_stats(),
+                    "questionnaire": questionnaire_responses.get_stats(),
+                },
+                "single_flight": QuestionnaireService.get_flight_stats(),
+                "sqlite_pool": Connection.get_pool_stats(),
+                "password_hasher": password_hasher.get_stats(),
+                "token_cache": token_cache.get_stats(),
             }
 
     def _setup_routers(self, app: FastAPI):
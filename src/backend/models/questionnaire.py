@@ -38,3 +38,4 @@ class Questionnaire(BaseModel):
     created_by: Optional[int] = None
     created_at: Optional[datetime] = None
     edited_at: Optional[datetime] = None
+    variant_of: Optional[str] = None
@@ -1,218 +1,534 @@
 import asyncio
-
-import concurrent
-from models.question import Question
+from collections import Counter
+from models.question import Question, QuestionStatus
 from bson import ObjectId
-from typing import Any, Dict, List, Optional
+from pymongo import ReturnDocument, UpdateOne
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import re
 
 from utils.mg_database import Database
+from utils.text_normalization import (
+    NGRAM_SIZE,
+    normalize_text,
+    subject_search_fields,
+    text_ngrams,
+)
+
+
+QUESTION_FIELDS = (
+    "question",
+    "subject",
+    "use",
+    "corrects",
+    "responses",
+    "remark",
+    "status",
+    "created_by",
+    "created_at",
+    "edited_at",
+)
+
+# Champs dérivés stockés pour la recherche, jamais renvoyés aux clients
+INTERNAL_FIELDS = ("subject_norm", "subject_ngrams")
+
+# Champs réservés aux rôles autorisés, exclus de la projection sinon
+ANSWER_FIELDS = ("corrects",)
+
+# Compteurs par sujet / usage (la collection des questions est celle par défaut,
+# COLLECTION_NAME)
+FACETS_COLLECTION = "facets"
+FACET_KINDS = ("subject", "use")
+FACET_STATUSES = ("active", "draft", "archive")
 
 
 class QuestionRepository:
     """
     Repository pour les opérations de base de données sur les questions.
-    Utilise pymongo (synchrone) avec des adaptateurs pour FastAPI (async).
+    Les collections exposent une interface asynchrone (AsyncMongoClient natif
+    ou pymongo synchrone dans le pool partagé, selon MONGO_DRIVER).
     """
 
     def __init__(self):
         pass  # La collection sera récupérée dynamiquement
 
-    async def _run_in_executor(self, sync_func):
-        loop = asyncio.get_event_loop()
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            return await loop.run_in_executor(executor, sync_func)
-
     def _get_collection(self):
         """
-        Récupère la collection de façon thread-safe.
+        Récupère la collection (interface asynchrone).
+        """
+        return Database.get_async_collection()
+
+    def _get_facets_collection(self):
+        """
+        Récupère la collection des facettes sujet/usage (interface asynchrone).
         """
-        return Database.get_collection()
+        return Database.get_async_collection(FACETS_COLLECTION)
+
+    @staticmethod
+    def _to_object_id(question_id: str) -> ObjectId:
+        """
+        Nettoie et convertit un identifiant en ObjectId.
+        """
+        clean_id = question_id.strip().strip("\"'")
+        try:
+            return ObjectId(clean_id)
+        except Exception:
+            raise ValueError("Identifiant MongoDB invalide")
+
+    @staticmethod
+    def _doc_to_question(doc: dict) -> Question:
+        """
+        Convertit un document MongoDB en objet Question.
+        """
+        return Question(
+            id=str(doc["_id"]),
+            question=doc.get("question"),
+            subject=doc.get("subject", []),
+            use=doc.get("use", []),
+            corrects=doc.get("corrects", []),
+            responses=doc.get("responses", []),
+            remark=doc.get("remark"),
+            status=doc.get("status") or "draft",
+            created_by=doc.get("created_by"),
+            created_at=doc.get("created_at"),
+            edited_at=doc.get("edited_at"),
+        )
 
     ################################################################################
     async def insert_question(self, question: Question) -> str:
         """
-        Insère une question en base de données MongoDB (version async wrapper).
+        Insère une question en base de données MongoDB.
         Args:
             question (Question): L'objet Question à insérer
         Returns:
             str: L'ID généré automatiquement par MongoDB
         """
+        try:
+            collection = self._get_collection()
 
-        def _sync_insert():
-            try:
-                collection = self._get_collection()
-
-                question_dict = {
-                    "question": question.question,
-                    "subject": question.subject,
-                    "use": question.use,
-                    "corrects": question.corrects,
-                    "responses": question.responses,
-                    "remark": question.remark,
-                    "status": question.status,
-                    "created_by": question.created_by,
-                    "created_at": question.created_at,
-                    "edited_at": question.edited_at,
-                }
-
-                # Dé-commenter pour ne pas enregistrer les champs null
-                # cleaned_dict = {k: v for k, v in question_dict.items() if v is not None}
-                # result = collection.insert_one(cleaned_dict)
-                # enregistre même les champs null
-                result = collection.insert_one(question_dict)
+            question_dict = {
+                "question": question.question,
+                "subject": question.subject,
+                "use": question.use,
+                "corrects": question.corrects,
+                "responses": question.responses,
+                "remark": question.remark,
+                "status": question.status,
+                "created_by": question.created_by,
+                "created_at": question.created_at,
+                "edited_at": question.edited_at,
+                **subject_search_fields(question.subject),
+            }
+
+            # Dé-commenter pour ne pas enregistrer les champs null
+            # cleaned_dict = {k: v for k, v in question_dict.items() if v is not None}
+            # result = await collection.insert_one(cleaned_dict)
+            # enregistre même les champs null
+            result = await collection.insert_one(question_dict)
+            await self._apply_facet_deltas(None, question_dict)
+
+            print(f"Question insérée avec l'ID: {result.inserted_id}")
+            return str(result.inserted_id)
+
+        except Exception as e:
+            print(f"Erreur lors de l'insertion: {e}")
+            raise
 
-                print(f"Question insérée avec l'ID: {result.inserted_id}")
-                return str(result.inserted_id)
+    ################################################################################
+    async def get_question_by_id(
+        self, question_id: str, show_corrects: bool = True
+    ) -> Optional[Question]:
+        oid = self._to_object_id(question_id)
 
-            except Exception as e:
-                print(f"Erreur lors de l'insertion: {e}")
-                raise
+        doc = await self._get_collection().find_one(
+            {"_id": oid}, self._build_projection(show_corrects=show_corrects)
+        )
+        if not doc:
+            return None
 
-        return await self._run_in_executor(_sync_insert)
+        return self._doc_to_question(doc)
 
     ################################################################################
-    async def get_question_by_id(self, question_id: str) -> Optional[Question]:
-        collection = self._get_collection()
-
-        def _sync_get():
-            clean_id = question_id.strip().strip("\"'")
-            try:
-                oid = ObjectId(clean_id)
-            except ValueError:
-                raise ValueError("Identifiant MongoDB invalide")
-
-            doc = collection.find_one({"_id": oid})
-            if not doc:
-                return None
-
-            return Question(
-                id=str(doc["_id"]),
-                question=doc.get("question"),
-                subject=doc.get("subject", []),
-                use=doc.get("use", []),
-                corrects=doc.get("corrects", []),
-                responses=doc.get("responses", []),
-                remark=doc.get("remark", ""),
-                status=doc.get("status") or "draft",
-                created_by=doc.get("created_by", ""),
-                created_at=doc.get("created_at", ""),
-                edited_at=doc.get("edited_at", ""),
-            )
+    async def get_questions_by_ids(
+        self, question_ids: List[str], show_corrects: bool = True
+    ) -> List[Question]:
+        """
+        Récupère plusieurs questions en une seule requête ($in).
+        Returns:
+            List[Question]: Questions dans l'ordre des identifiants fournis (introuvables ignorées)
+        """
+        oids = [self._to_object_id(question_id) for question_id in question_ids]
+        if not oids:
+            return []
 
-        return await self._run_in_executor(_sync_get)
+        cursor = self._get_collection().find(
+            {"_id": {"$in": list(dict.fromkeys(oids))}},
+            self._build_projection(show_corrects=show_corrects),
+        )
+        questions_map = {doc["_id"]: self._doc_to_question(doc) async for doc in cursor}
+        return [questions_map[oid] for oid in oids if oid in questions_map]
 
     ################################################################################
     async def get_questions_by_subject(
         self, subject: str, limit: int = 10
     ) -> List[dict]:
         """
-        Récupère les questions par sujet (version async wrapper).
+        Récupère les questions par sujet.
         """
-
-        def _sync_get_by_subject():
-            collection = self._get_collection()
-            cursor = collection.find({"subject": subject}).limit(limit)
-            results = []
-            for doc in cursor:
-                doc["_id"] = str(doc["_id"])  # Convertir ObjectId en string
-                results.append(doc)
-            return results
-
-        return await self._run_in_executor(_sync_get_by_subject)
+        cursor = self._get_collection().find({"subject": subject}).limit(limit)
+        results = []
+        async for doc in cursor:
+            doc["_id"] = str(doc["_id"])  # Convertir ObjectId en string
+            results.append(doc)
+        return results
 
     ################################################################################
     async def get_all_questions(self) -> List[Question]:
         """
         Récupère l'ensemble des questions stockées dans la collection.
         """
-        collection = self._get_collection()
+        cursor = self._get_collection().find()  # pas de filtre
+        return [self._doc_to_question(doc) async for doc in cursor]
+
+    def _build_query(
+        self,
+        subjects: Optional[List[str]] = None,
+        uses: Optional[List[str]] = None,
+        statuses: Optional[List[str]] = None,
+        after: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Construit le filtre MongoDB des listings (sujets, usages, statuts, reprise après _id).
+        """
+        query: Dict[str, Any] = {}
+        if subjects:
+            query["subject"] = {"$in": subjects}
+        if uses:
+            query["use"] = {"$in": uses}
+        if statuses:
+            # Un statut absent est considéré comme "draft"
+            values = list(statuses) + ([None] if "draft" in statuses else [])
+            query["status"] = {"$in": values}
+        if after:
+            query["_id"] = {"$gt": self._to_object_id(after)}
+        return query
+
+    @staticmethod
+    def _build_projection(
+        fields: Optional[List[str]] = None, show_corrects: bool = True
+    ) -> Optional[dict]:
+        """
+        Construit la projection MongoDB (None = document complet hors champs internes).
+        Sans show_corrects, les réponses correctes ne sont pas lues en base.
+        """
+        hidden = () if show_corrects else ANSWER_FIELDS
+        if fields is None:
+            return {field: 0 for field in INTERNAL_FIELDS + hidden}
+        projection = {
+            field: 1
+            for field in fields
+            if field in QUESTION_FIELDS and field not in hidden
+        }
+        projection["_id"] = 1
+        return projection
 
-        def _sync_get_all():
-            cursor = collection.find()  # pas de filtre
-            results: List[Question] = []
-            for doc in cursor:
-                results.append(
-                    Question(
-                        id=str(doc["_id"]),
-                        question=doc.get("question"),
-                        subject=doc.get("subject", []),
-                        use=doc.get("use", []),
-                        corrects=doc.get("corrects", []),
-                        responses=doc.get("responses", []),
-                        remark=doc.get("remark"),
-                        status=(doc.get("status") or "draft"),
-                        created_by=doc.get("created_by"),
-                        created_at=doc.get("created_at"),
-                        edited_at=doc.get("edited_at"),
-                    )
-                )
-            return results
+    ################################################################################
+    async def find_questions(
+        self,
+        subjects: Optional[List[str]] = None,
+        uses: Optional[List[str]] = None,
+        statuses: Optional[List[str]] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        show_corrects: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Liste les questions avec filtres, pagination par clé (_id) et projection.
+        Args:
+            subjects: Au moins un de ces sujets
+            uses: Au moins un de ces usages
+            statuses: Un de ces statuts
+            after: Dernier _id de la page précédente (exclu)
+            limit: Taille de la page (None = pas de limite)
+            fields: Champs à renvoyer (None = tous) ; 'id' est toujours présent
+            show_corrects: False pour exclure les réponses correctes de la projection
+        Returns:
+            List[dict]: Documents triés par _id, avec 'id' à la place de '_id'
+        """
+        query = self._build_query(subjects, uses, statuses, after)
+        projection = self._build_projection(fields, show_corrects)
+
+        cursor = self._get_collection().find(query, projection).sort("_id", 1)
+        if limit:
+            cursor = cursor.limit(limit).batch_size(limit)
 
-        return await self._run_in_executor(_sync_get_all)
+        results = []
+        async for doc in cursor:
+            doc["id"] = str(doc.pop("_id"))
+            results.append(doc)
+        return results
 
     ################################################################################
-    async def get_distinct_subjects(self) -> List[str]:
+    def iter_questions(
+        self,
+        subjects: Optional[List[str]] = None,
+        uses: Optional[List[str]] = None,
+        statuses: Optional[List[str]] = None,
+        fields: Optional[List[str]] = None,
+        batch_size: int = 500,
+        show_corrects: bool = True,
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
-        Retourne la liste distincte des sujets présents dans la collection.
+        Parcourt les questions par lots sans les charger toutes en mémoire.
+        Les paramètres sont validés immédiatement ; la lecture commence à l'itération.
+        Returns:
+            AsyncIterator[dict]: Documents triés par _id, avec 'id' à la place de '_id'
         """
+        query = self._build_query(subjects, uses, statuses)
+        projection = self._build_projection(fields, show_corrects)
+        cursor = (
+            self._get_collection()
+            .find(query, projection)
+            .sort("_id", 1)
+            .batch_size(batch_size)
+        )
 
-        def _sync_distinct():
-            collection = self._get_collection()
-            subjects = collection.distinct("subject")
-            subjects = [s for s in subjects if s]  # filtre None / ""
-            subjects.sort()
-            return subjects
+        async def _iterate():
+            async for doc in cursor:
+                yield {"id": str(doc.pop("_id")), **doc}
 
-        return await self._run_in_executor(_sync_distinct)
+        return _iterate()
 
     ################################################################################
-    async def get_distinct_uses(self) -> List[str]:
+    async def search_questions_text(
+        self,
+        text: str,
+        statuses: Optional[List[str]] = None,
+        offset: int = 0,
+        limit: int = 20,
+        fields: Optional[List[str]] = None,
+        show_corrects: bool = True,
+    ) -> List[Dict[str, Any]]:
         """
-        Retourne la liste distincte des champs 'use' présents dans la collection.
+        Recherche plein texte (index "question_text" : intitulé, propositions, remarque),
+        avec racinisation française, triée par pertinence décroissante.
+        Args:
+            text: Termes recherchés ("expression exacte" et -exclusion acceptées)
+            statuses: Un de ces statuts
+            offset: Nombre de résultats à sauter
+            limit: Taille de la page
+            fields: Champs à renvoyer (None = tous)
+            show_corrects: False pour exclure les réponses correctes de la projection
+        Returns:
+            List[dict]: Documents avec 'id' et 'score' (pertinence)
         """
+        query: Dict[str, Any] = {"$text": {"$search": text, "$language": "french"}}
+        query.update(self._build_query(statuses=statuses))
+
+        projection = self._build_projection(fields, show_corrects)
+        projection["score"] = {"$meta": "textScore"}
+
+        cursor = (
+            self._get_collection()
+            .find(query, projection)
+            .sort([("score", {"$meta": "textScore"}), ("_id", 1)])
+            .skip(offset)
+            .limit(limit)
+            .batch_size(limit)
+        )
+
+        results = []
+        async for doc in cursor:
+            doc["id"] = str(doc.pop("_id"))
+            results.append(doc)
+        return results
 
-        def _sync_distinct():
-            collection = self._get_collection()
-            uses = collection.distinct("use")
-            uses = [u for u in uses if u]  # filtre None / ""
-            uses.sort()
-            return uses
+    ################################################################################
+    async def get_distinct_subjects(self) -> List[str]:
+        """
+        Retourne la liste distincte des sujets présents dans la collection.
+        """
+        subjects = await self._get_collection().distinct("subject")
+        subjects = [s for s in subjects if s]  # filtre None / ""
+        subjects.sort()
+        return subjects
 
-        return await self._run_in_executor(_sync_distinct)
+    ################################################################################
+    async def get_distinct_uses(self) -> List[str]:
+        """
+        Retourne la liste distincte des champs 'use' présents dans la collection.
+        """
+        uses = await self._get_collection().distinct("use")
+        uses = [u for u in uses if u]  # filtre None / ""
+        uses.sort()
+        return uses
 
     ###############################################################################
     async def search_questions_by_subject_substring(
-        self, subject_name: str, limit: int = 50
+        self,
+        subject_name: str,
+        limit: int = 50,
+        prefix: bool = False,
+        show_corrects: bool = True,
     ) -> List[Question]:
         """
-        Recherche sur les éléments du tableau 'subject'
-        en utilisant un regex MongoDB.
+        Recherche sur les sujets normalisés (minuscules, sans accents ni ponctuation).
+        - prefix=True : un sujet commence par le terme (parcours d'intervalle sur l'index subject_norm)
+        - sinon : un sujet contient le terme (index des n-grammes, puis vérification exacte)
         """
+        query = self._subject_search_query(subject_name, prefix=prefix)
+        projection = self._build_projection(show_corrects=show_corrects)
+        cursor = self._get_collection().find(query, projection).limit(limit)
+        return [self._doc_to_question(doc) async for doc in cursor]
 
-        def _sync_search():
-            collection = self._get_collection()
-            query = {"subject": {"$regex": subject_name, "$options": "i"}}
-            cursor = collection.find(query).limit(limit)
-            results: List[Question] = []
-            for doc in cursor:
-                results.append(
-                    Question(
-                        id=str(doc["_id"]),
-                        question=doc.get("question"),
-                        subject=doc.get("subject", []),
-                        use=doc.get("use", []),
-                        corrects=doc.get("corrects", []),
-                        responses=doc.get("responses", []),
-                        remark=doc.get("remark", ""),
-                        status=doc.get("status") or "draft",
-                        created_by=doc.get("created_by", ""),
-                        created_at=doc.get("created_at", ""),
-                        edited_at=doc.get("edited_at", ""),
-                    )
+    @staticmethod
+    def _subject_search_query(subject_name: str, prefix: bool = False) -> Dict[str, Any]:
+        """
+        Construit le filtre de recherche d'un terme dans les sujets normalisés.
+        Raises:
+            ValueError: Si le terme est vide après normalisation (ex. "?", "—")
+        """
+        term = normalize_text(subject_name)
+        if not term:
+            raise ValueError(
+                f"Terme de sujet '{subject_name}' invalide : aucune lettre ni chiffre"
+            )
+        if prefix:
+            return {"subject_norm": {"$regex": f"^{re.escape(term)}"}}
+        if len(term) >= NGRAM_SIZE:
+            return {
+                "subject_ngrams": {"$all": sorted(text_ngrams(term))},
+                "subject_norm": {"$regex": re.escape(term)},
+            }
+        # Terme trop court pour les n-grammes : parcours des clés de l'index
+        return {"subject_norm": {"$regex": re.escape(term)}}
+
+    ###############################################################################
+    async def sample_active_questions(
+        self, subjects: List[str], exclude_ids: List[str], size: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Tire au hasard, côté serveur ($sample), des questions actives dont un sujet
+        contient l'un des termes donnés, hors des identifiants exclus.
+        Returns:
+            List[dict]: Au plus 'size' éléments {"id", "question"}
+        """
+        terms = [s for s in subjects if s]
+        if not terms or size <= 0:
+            return []
+
+        match = self._sample_match(
+            [self._subject_search_query(term) for term in terms], exclude_ids
+        )
+        return await self._sample(match, size)
+
+    ###############################################################################
+    async def sample_active_questions_by_buckets(
+        self, buckets: List[Tuple[str, str, int]], exclude_ids: List[str]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Tire au hasard des questions actives pour plusieurs compartiments : un
+        $match + $sample de la taille du compartiment par compartiment, les tirages
+        étant exécutés en parallèle. Un même document peut sortir dans plusieurs
+        compartiments (dédoublonnage à la charge de l'appelant).
+        Args:
+            buckets: (kind, valeur, taille) ; kind "subject" (sujet contenant la valeur)
+                ou "use" (usage exact)
+            exclude_ids: Identifiants à exclure
+        Returns:
+            List[List[dict]]: Pour chaque compartiment, au plus 'taille' éléments {"id", "question"}
+        """
+        matches = []
+        for kind, value, _ in buckets:
+            if kind not in FACET_KINDS:
+                raise ValueError(
+                    f"Compartiment '{kind}' inconnu. Utilisez 'subject' ou 'use'."
                 )
-            return results
+            bucket_filter = (
+                self._subject_search_query(value) if kind == "subject" else {"use": value}
+            )
+            matches.append(self._sample_match([bucket_filter], exclude_ids))
 
-        return await self._run_in_executor(_sync_search)
+        return list(
+            await asyncio.gather(
+                *(
+                    self._sample(match, size)
+                    for match, (_, _, size) in zip(matches, buckets)
+                )
+            )
+        )
+
+    async def _sample(self, match: Dict[str, Any], size: int) -> List[Dict[str, Any]]:
+        """
+        $match puis $sample de 'size' documents, projetés sur {"id", "question"}.
+        """
+        if size <= 0:
+            return []
+        pipeline = [
+            {"$match": match},
+            {"$sample": {"size": size}},
+            {"$project": {"_id": 1, "question": 1}},
+        ]
+        cursor = await self._get_collection().aggregate(pipeline)
+        return [
+            {"id": str(doc["_id"]), "question": doc.get("question")}
+            async for doc in cursor
+        ]
+
+    def _sample_match(
+        self, filters: List[Dict[str, Any]], exclude_ids: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Filtre commun des tirages : questions actives, au moins un des filtres, hors exclusions.
+        """
+        excluded = []
+        for question_id in exclude_ids:
+            try:
+                excluded.append(self._to_object_id(question_id))
+            except ValueError:
+                continue  # id invalide : ne peut correspondre à aucune question
+
+        match: Dict[str, Any] = {
+            "status": QuestionStatus.ACTIVE.value,
+            "$or": filters,
+        }
+        if excluded:
+            match["_id"] = {"$nin": excluded}
+        return match
+
+    ###############################################################################
+    async def backfill_subject_search_fields(self, batch_size: int = 500) -> int:
+        """
+        Calcule subject_norm / subject_ngrams pour les questions qui en sont dépourvues
+        (ex. insérées par bdd/populate_mongo.py).
+        Returns:
+            int: Nombre de questions mises à jour
+        """
+        collection = self._get_collection()
+        cursor = collection.find(
+            {"subject_norm": {"$exists": False}}, {"subject": 1}
+        ).batch_size(batch_size)
+
+        updated = 0
+        operations = []
+        async for doc in cursor:
+            operations.append(
+                UpdateOne(
+                    {"_id": doc["_id"]},
+                    {"$set": subject_search_fields(doc.get("subject") or [])},
+                )
+            )
+            if len(operations) >= batch_size:
+                await collection.bulk_write(operations, ordered=False)
+                updated += len(operations)
+                operations = []
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+
+        if updated:
+            print(f"Champs de recherche des sujets calculés pour {updated} question(s)")
+        return updated
 
     #################################################################################
     async def update_question(
@@ -226,33 +542,269 @@ class QuestionRepository:
         Returns:
             bool: True si la mise à jour a réussi
         """
+        try:
+            collection = self._get_collection()
+            oid = self._to_object_id(question_id)
+
+            # Dé-commenter pour ne pas enregistrer les champs null
+            # cleaned_data = {k: v for k, v in update_data.items() if v is not None}
+            # enregistre même les champs null
+            changes = dict(update_data)
+            if "subject" in changes:
+                changes.update(subject_search_fields(changes["subject"] or []))
+
+            # Le document avant modification sert à mettre à jour les facettes
+            before = await collection.find_one_and_update(
+                {"_id": oid},
+                {"$set": changes},
+                return_document=ReturnDocument.BEFORE,
+            )
 
-        def _sync_update():
-            try:
-                collection = self._get_collection()
-                clean_id = question_id.strip().strip("\"'")
+            if before is None:
+                raise LookupError("Question introuvable")
 
-                try:
-                    oid = ObjectId(clean_id)
-                except ValueError:
-                    raise ValueError("Identifiant MongoDB invalide")
+            await self._apply_facet_deltas(before, {**before, **update_data})
 
-                # Dé-commenter pour ne pas enregistrer les champs null
-                # cleaned_data = {k: v for k, v in update_data.items() if v is not None}
-                # result = collection.update_one({"_id": oid}, {"$set": cleaned_data})
-                # enregistre même les champs null
-                result = collection.update_one({"_id": oid}, {"$set": update_data})
+            modified = [k for k, v in update_data.items() if before.get(k) != v]
+            print(
+                f"Question {question_id} mise à jour: {len(modified)} champ(s) modifié(s)"
+            )
+            return len(modified) > 0
 
-                if result.matched_count == 0:
-                    raise LookupError("Question introuvable")
+        except Exception as e:
+            print(f"Erreur lors de la mise à jour: {e}")
+            raise
 
-                print(
-                    f"Question {question_id} mise à jour: {result.modified_count} champ(s) modifié(s)"
-                )
-                return result.modified_count > 0
+    ################################################################################
+    # FACETTES : compteurs par sujet / usage et par statut (collection "facets")
+    ################################################################################
+    @staticmethod
+    def _facet_entries(doc: Optional[Dict[str, Any]]) -> Counter:
+        """
+        Liste les contributions d'un document aux facettes : (kind, valeur, statut) -> 1.
+        """
+        entries: Counter = Counter()
+        if not doc:
+            return entries
+        status = doc.get("status") or "draft"
+        status = getattr(status, "value", status)
+        for kind in FACET_KINDS:
+            for value in set(doc.get(kind) or []):
+                if isinstance(value, str) and value:
+                    entries[(kind, value, status)] += 1
+        return entries
+
+    async def _apply_facet_deltas(
+        self, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]
+    ) -> None:
+        """
+        Répercute incrémentalement sur les facettes le passage d'un document
+        de l'état 'before' à l'état 'after' (None = inexistant).
+        """
+        deltas: Dict[Tuple[str, str, str], int] = dict(self._facet_entries(after))
+        for key, count in self._facet_entries(before).items():
+            deltas[key] = deltas.get(key, 0) - count
+
+        operations = [
+            UpdateOne(
+                {"_id": f"{kind}:{value}"},
+                {
+                    "$inc": {f"counts.{status}": delta, "total": delta},
+                    "$setOnInsert": {
+                        "kind": kind,
+                        "value": value,
+                        "value_norm": normalize_text(value),
+                    },
+                },
+                upsert=True,
+            )
+            for (kind, value, status), delta in deltas.items()
+            if delta
+        ]
+        if operations:
+            await self._get_facets_collection().bulk_write(operations, ordered=False)
+
+    @staticmethod
+    def _facet_contributions_pipeline() -> List[Dict[str, Any]]:
+        """
+        Étapes communes au recalcul et au contrôle des facettes : un document
+        {"status", "facet": {"kind", "value"}} par valeur distincte de chaque question.
+        """
+        facet_values = [
+            {
+                "$map": {
+                    "input": {"$setUnion": [{"$ifNull": [f"${kind}", []]}, []]},
+                    "as": "v",
+                    "in": {"kind": kind, "value": "$$v"},
+                }
+            }
+            for kind in FACET_KINDS
+        ]
+        return [
+            {
+                "$project": {
+                    "status": {"$ifNull": ["$status", "draft"]},
+                    "facet": {"$concatArrays": facet_values},
+                }
+            },
+            {"$unwind": "$facet"},
+            {"$match": {"facet.value": {"$type": "string", "$ne": ""}}},
+        ]
 
-            except Exception as e:
-                print(f"Erreur lors de la mise à jour: {e}")
-                raise
+    async def rebuild_facets(self) -> int:
+        """
+        Recalcule entièrement la collection des facettes depuis les questions
+        (remplacement atomique via $out), puis calcule leurs formes normalisées.
+        Les incréments des autres instances pendant le calcul sont écrasés :
+        étape d'administration explicite, ou au démarrage sur une collection vide
+        ou désynchronisée.
+        Returns:
+            int: Nombre de facettes générées
+        """
+        pipeline = self._facet_contributions_pipeline() + [
+            {
+                "$group": {
+                    "_id": {
+                        "kind": "$facet.kind",
+                        "value": "$facet.value",
+                        "status": "$status",
+                    },
+                    "n": {"$sum": 1},
+                }
+            },
+            {
+                "$group": {
+                    "_id": {"kind": "$_id.kind", "value": "$_id.value"},
+                    "counts": {"$push": {"k": "$_id.status", "v": "$n"}},
+                    "total": {"$sum": "$n"},
+                }
+            },
+            {
+                "$project": {
+                    "_id": {"$concat": ["$_id.kind", ":", "$_id.value"]},
+                    "kind": "$_id.kind",
+                    "value": "$_id.value",
+                    "counts": {"$arrayToObject": "$counts"},
+                    "total": 1,
+                }
+            },
+            {"$out": FACETS_COLLECTION},
+        ]
+        cursor = await self._get_collection().aggregate(pipeline)
+        await cursor.to_list(None)
+        await self.backfill_facet_norms()
+        count = await self._get_facets_collection().count_documents({})
+        print(f"Facettes recalculées: {count}")
+        return count
+
+    async def facets_match_questions(self) -> bool:
+        """
+        Compare, par type et par statut, la somme des compteurs des facettes au
+        nombre de couples (question, valeur) des questions : détecte les écritures
+        faites sans passer par le repository (import direct en base). Parcourt toutes
+        les questions : contrôle de démarrage.
+        """
+        expected_pipeline = self._facet_contributions_pipeline() + [
+            {
+                "$group": {
+                    "_id": {"kind": "$facet.kind", "status": "$status"},
+                    "n": {"$sum": 1},
+                }
+            },
+        ]
+        stored_pipeline = [
+            {"$project": {"kind": 1, "count": {"$objectToArray": "$counts"}}},
+            {"$unwind": "$count"},
+            {
+                "$group": {
+                    "_id": {"kind": "$kind", "status": "$count.k"},
+                    "n": {"$sum": "$count.v"},
+                }
+            },
+        ]
+
+        async def totals(collection, pipeline) -> Dict[Tuple[str, str], int]:
+            cursor = await collection.aggregate(pipeline)
+            return {
+                (doc["_id"]["kind"], doc["_id"]["status"]): doc["n"]
+                async for doc in cursor
+                if doc["n"]
+            }
+
+        expected, stored = await asyncio.gather(
+            totals(self._get_collection(), expected_pipeline),
+            totals(self._get_facets_collection(), stored_pipeline),
+        )
+        return expected == stored
+
+    async def count_facets(self) -> int:
+        """
+        Nombre de facettes stockées (0 : collection jamais calculée).
+        """
+        return await self._get_facets_collection().count_documents({})
+
+    async def backfill_facet_norms(self) -> int:
+        """
+        Calcule value_norm pour les facettes qui en sont dépourvues
+        ($out ou anciennes versions). Les facettes sont peu nombreuses.
+        Returns:
+            int: Nombre de facettes mises à jour
+        """
+        facets = self._get_facets_collection()
+        cursor = facets.find({"value_norm": {"$exists": False}}, {"value": 1})
+        operations = [
+            UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": {"value_norm": normalize_text(doc.get("value") or "")}},
+            )
+            async for doc in cursor
+        ]
+        if operations:
+            await facets.bulk_write(operations, ordered=False)
+        return len(operations)
 
-        return await self._run_in_executor(_sync_update)
+    async def count_active_by_subject_terms(self, terms: List[str]) -> int:
+        """
+        Somme des questions actives des sujets dont la forme normalisée contient
+        l'un des termes (normalisés), calculée par MongoDB sur les facettes.
+        """
+        terms = [t for t in terms if t]
+        if not terms:
+            return 0
+        pipeline = [
+            {
+                "$match": {
+                    "kind": "subject",
+                    "value_norm": {"$regex": "|".join(re.escape(t) for t in terms)},
+                    "counts.active": {"$gt": 0},
+                }
+            },
+            {"$group": {"_id": None, "n": {"$sum": "$counts.active"}}},
+        ]
+        cursor = await self._get_facets_collection().aggregate(pipeline)
+        results = await cursor.to_list(None)
+        return results[0]["n"] if results else 0
+
+    async def get_facets(self, kind: str) -> List[Dict[str, Any]]:
+        """
+        Retourne les facettes d'un type ("subject" ou "use") avec leurs compteurs par statut.
+        """
+        if kind not in FACET_KINDS:
+            raise ValueError(f"Facette '{kind}' inconnue. Utilisez 'subject' ou 'use'.")
+
+        cursor = (
+            self._get_facets_collection()
+            .find({"kind": kind, "total": {"$gt": 0}})
+            .sort("value", 1)
+        )
+        results = []
+        async for doc in cursor:
+            counts = doc.get("counts") or {}
+            results.append(
+                {
+                    "value": doc["value"],
+                    "counts": {s: counts.get(s, 0) for s in FACET_STATUSES},
+                    "total": doc.get("total", 0),
+                }
+            )
+        return results
@@ -1,15 +1,24 @@
-import asyncio
-import concurrent
-from models.questionnaire import Questionnaire, QItem
+from models.questionnaire import Questionnaire, QItem, QuestionnaireStatus
 from utils.mg_database import database
 from bson import ObjectId
 from typing import Any, Dict, List, Optional
 
+COLLECTION_NAME = "questionnaires"
+
+# Questions complètes matérialisées sur le questionnaire (lecture "full" en un accès)
+SNAPSHOT_FIELD = "full"
+# Champs de question recopiés dans le snapshot
+SNAPSHOT_QUESTION_FIELDS = ("question", "corrects", "responses", "remark")
+# Génération du snapshot, incrémentée à chaque invalidation : un snapshot calculé
+# avant une invalidation n'est jamais enregistré après elle
+SNAPSHOT_VERSION_FIELD = "full_version"
+
 
 class QuestionnaireRepository:
     """
     Repository pour les opérations de base de données sur les questionnaires.
-    Utilise pymongo (synchrone) avec des adaptateurs pour FastAPI (async).
+    Les collections exposent une interface asynchrone (AsyncMongoClient natif
+    ou pymongo synchrone dans le pool partagé, selon MONGO_DRIVER).
     """
 
     def __init__(self):
@@ -17,55 +26,120 @@ class QuestionnaireRepository:
 
     def _get_collection(self):
         """
-        Récupère la collection de façon thread-safe.
+        Récupère la collection des questionnaires (interface asynchrone).
         """
-        return database.get_collection("questionnaires")
+        return database.get_async_collection(COLLECTION_NAME)
 
     def _get_questions_collection(self):
         """
-        Récupère la collection des questions de façon thread-safe.
+        Récupère la collection des questions, celle par défaut (interface asynchrone).
         """
-        return database.get_collection("questions")
+        return database.get_async_collection()
+
+    @staticmethod
+    def _to_object_id(questionnaire_id: str) -> ObjectId:
+        """
+        Nettoie et convertit un identifiant en ObjectId.
+        """
+        clean_id = questionnaire_id.strip().strip("\"'")
+        try:
+            return ObjectId(clean_id)
+        except Exception:
+            raise ValueError("Identifiant MongoDB invalide")
+
+    @staticmethod
+    def _doc_to_questionnaire(
+        doc: dict, questions: Optional[List[Any]] = None
+    ) -> Questionnaire:
+        """
+        Convertit un document MongoDB en objet Questionnaire.
+        Args:
+            doc: Document MongoDB
+            questions: Liste de questions à utiliser à la place de celle du document
+        """
+        return Questionnaire(
+            id=str(doc["_id"]),
+            title=doc.get("title"),
+            subjects=doc.get("subjects", []),
+            uses=doc.get("uses", []),
+            questions=(
+                questions if questions is not None else doc.get("questions", [])
+            ),
+            remark=doc.get("remark"),
+            status=doc.get("status") or "draft",
+            created_by=doc.get("created_by"),
+            created_at=doc.get("created_at"),
+            edited_at=doc.get("edited_at"),
+            variant_of=doc.get("variant_of"),
+        )
+
+    @staticmethod
+    def _questionnaire_to_doc(questionnaire: Questionnaire) -> Dict[str, Any]:
+        """
+        Convertit un objet Questionnaire en document MongoDB (sans _id).
+        """
+        doc = {
+            "title": questionnaire.title,
+            "subjects": questionnaire.subjects,
+            "uses": questionnaire.uses,
+            "questions": [
+                q.model_dump() if isinstance(q, QItem) else q
+                for q in questionnaire.questions
+            ],
+            "remark": questionnaire.remark,
+            "status": questionnaire.status,
+            "created_by": questionnaire.created_by,
+            "created_at": questionnaire.created_at,
+            "edited_at": questionnaire.edited_at,
+        }
+        if questionnaire.variant_of:
+            doc["variant_of"] = questionnaire.variant_of
+        return doc
 
     ################################################################################
     async def insert_questionnaire(self, questionnaire: Questionnaire) -> str:
         """
-        Insère un questionnaire en base de données MongoDB (version async wrapper).
+        Insère un questionnaire en base de données MongoDB.
         Args:
             questionnaire (Questionnaire): L'objet Questionnaire à insérer
         Returns:
             str: L'ID généré automatiquement par MongoDB
         """
+        try:
+            collection = self._get_collection()
 
-        def _sync_insert():
-            try:
-                collection = self._get_collection()
+            questionnaire_dict = self._questionnaire_to_doc(questionnaire)
 
-                questionnaire_dict = {
-                    "title": questionnaire.title,
-                    "subjects": questionnaire.subjects,
-                    "uses": questionnaire.uses,
-                    "questions": questionnaire.questions,
-                    "remark": questionnaire.remark,
-                    "status": questionnaire.status,
-                    "created_by": questionnaire.created_by,
-                    "created_at": questionnaire.created_at,
-                    "edited_at": questionnaire.edited_at,
-                }
+            result = await collection.insert_one(questionnaire_dict)
 
-                result = collection.insert_one(questionnaire_dict)
+            print(f"Questionnaire inséré avec l'ID: {result.inserted_id}")
+            return str(result.inserted_id)
 
-                print(f"Questionnaire inséré avec l'ID: {result.inserted_id}")
-                return str(result.inserted_id)
+        except Exception as e:
+            print(f"Erreur lors de l'insertion: {e}")
+            raise
 
-            except Exception as e:
-                print(f"Erreur lors de l'insertion: {e}")
-                raise
+    ################################################################################
+    async def insert_questionnaires(
+        self, questionnaires: List[Questionnaire]
+    ) -> List[str]:
+        """
+        Insère plusieurs questionnaires en une seule opération (insert_many).
+        Returns:
+            List[str]: Les IDs générés, dans l'ordre des questionnaires
+        """
+        if not questionnaires:
+            return []
+        try:
+            result = await self._get_collection().insert_many(
+                [self._questionnaire_to_doc(q) for q in questionnaires]
+            )
+            print(f"{len(result.inserted_ids)} questionnaire(s) inséré(s)")
+            return [str(oid) for oid in result.inserted_ids]
 
-        loop = asyncio.get_event_loop()
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(executor, _sync_insert)
-            return result
+        except Exception as e:
+            print(f"Erreur lors de l'insertion: {e}")
+            raise
 
     ################################################################################
     async def get_short_questionnaire_by_id(
@@ -74,35 +148,15 @@ class QuestionnaireRepository:
         """
         Récupère un questionnaire par son ID MongoDB (format court : id + question seulement).
         """
-        collection = self._get_collection()
+        oid = self._to_object_id(questionnaire_id)
 
-        def _sync_get():
-            clean_id = questionnaire_id.strip().strip("\"'")
-            try:
-                oid = ObjectId(clean_id)
-            except ValueError:
-                raise ValueError("Identifiant MongoDB invalide")
-
-            doc = collection.find_one({"_id": oid})
-            if not doc:
-                return None
-
-            return Questionnaire(
-                id=str(doc["_id"]),
-                title=doc.get("title"),
-                subjects=doc.get("subjects", []),
-                uses=doc.get("uses", []),
-                questions=doc.get("questions", []),
-                remark=doc.get("remark"),
-                status=doc.get("status") or "draft",
-                created_by=doc.get("created_by"),
-                created_at=doc.get("created_at"),
-                edited_at=doc.get("edited_at"),
-            )
+        doc = await self._get_collection().find_one(
+            {"_id": oid}, {SNAPSHOT_FIELD: 0}
+        )
+        if not doc:
+            return None
 
-        loop = asyncio.get_event_loop()
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            return await loop.run_in_executor(executor, _sync_get)
+        return self._doc_to_questionnaire(doc)
 
     ################################################################################
     async def get_full_questionnaire_by_id(
@@ -110,70 +164,126 @@ class QuestionnaireRepository:
     ) -> Optional[Questionnaire]:
         """
         Récupère un questionnaire par son ID MongoDB avec les questions complètes.
-        Effectue une jointure avec la collection "questions" pour enrichir les données.
+        Lit le snapshot "full" s'il existe ; sinon effectue la jointure avec la collection
+        "questions" et, pour un questionnaire actif, enregistre le snapshot obtenu.
+        """
+        oid = self._to_object_id(questionnaire_id)
+
+        doc = await self._get_collection().find_one({"_id": oid})
+        if not doc:
+            return None
+
+        snapshot = doc.get(SNAPSHOT_FIELD)
+        if snapshot is not None:
+            return self._doc_to_questionnaire(
+                doc, questions=[QItem(**item) for item in snapshot]
+            )
+
+        question_items = doc.get("questions", [])
+        full_questions = await self._build_full_questions(question_items)
+
+        if (doc.get("status") or "draft") == QuestionnaireStatus.ACTIVE.value:
+            await self._save_snapshot(
+                oid, question_items, full_questions, doc.get(SNAPSHOT_VERSION_FIELD)
+            )
+
+        return self._doc_to_questionnaire(doc, questions=full_questions)
+
+    async def _build_full_questions(
+        self, question_items: List[Dict[str, Any]]
+    ) -> List[QItem]:
         """
-        questionnaires_collection = self._get_collection()
-        questions_collection = self._get_questions_collection()
+        Jointure des éléments {id, question} avec la collection "questions" ($in),
+        dans l'ordre du questionnaire ; les questions introuvables sont ignorées.
+        """
+        question_ids = []
 
-        def _sync_get_full():
-            clean_id = questionnaire_id.strip().strip("\"'")
+        for item in question_items:
             try:
-                oid = ObjectId(clean_id)
-            except ValueError:
-                raise ValueError("Identifiant MongoDB invalide")
+                q_id = item.get("id")
+                if q_id:
+                    question_ids.append(ObjectId(q_id))
+            except Exception as e:
+                print(f"ID question invalide ignoré: {item.get('id')} - {e}")
 
-            doc = questionnaires_collection.find_one({"_id": oid})
-            if not doc:
-                return None
+        full_questions = []
+        if question_ids:
+            projection = {field: 1 for field in SNAPSHOT_QUESTION_FIELDS}
+            questions_cursor = self._get_questions_collection().find(
+                {"_id": {"$in": question_ids}}, projection
+            )
 
-            question_items = doc.get("questions", [])
-            question_ids = []
+            questions_map = {}
+            async for q_doc in questions_cursor:
+                questions_map[str(q_doc["_id"])] = QItem(
+                    id=str(q_doc["_id"]),
+                    question=q_doc.get("question"),
+                    corrects=q_doc.get("corrects", []),
+                    responses=q_doc.get("responses", []),
+                    remark=q_doc.get("remark"),
+                )
 
             for item in question_items:
-                try:
-                    q_id = item.get("id")
-                    if q_id:
-                        question_ids.append(ObjectId(q_id))
-                except Exception as e:
-                    print(f"ID question invalide ignoré: {item.get('id')} - {e}")
-
-            full_questions = []
-            if question_ids:
-                questions_cursor = questions_collection.find(
-                    {"_id": {"$in": question_ids}}
-                )
+                q_id = item.get("id")
+                if q_id in questions_map:
+                    full_questions.append(questions_map[q_id])
+
+        return full_questions
+
+    async def _save_snapshot(
+        self,
+        oid: ObjectId,
+        question_items: List[Dict[str, Any]],
+        full_questions: List[QItem],
+        version: Optional[int],
+    ) -> None:
+        """
+        Enregistre le snapshot, seulement si ni la liste des questions ni la génération
+        lue avant la jointure (None : jamais invalidé) n'ont changé entre-temps.
+        """
+        await self._get_collection().update_one(
+            {
+                "_id": oid,
+                "questions": question_items,
+                SNAPSHOT_VERSION_FIELD: version,
+            },
+            {"$set": {SNAPSHOT_FIELD: [q.model_dump() for q in full_questions]}},
+        )
 
-                questions_map = {}
-                for q_doc in questions_cursor:
-                    questions_map[str(q_doc["_id"])] = QItem(
-                        id=str(q_doc["_id"]),
-                        question=q_doc.get("question"),
-                        corrects=q_doc.get("corrects", []),
-                        responses=q_doc.get("responses", []),
-                        remark=q_doc.get("remark"),
-                    )
-
-                for item in question_items:
-                    q_id = item.get("id")
-                    if q_id in questions_map:
-                        full_questions.append(questions_map[q_id])
-
-            return Questionnaire(
-                id=str(doc["_id"]),
-                title=doc.get("title"),
-                subjects=doc.get("subjects", []),
-                uses=doc.get("uses", []),
-                questions=full_questions,
-                remark=doc.get("remark"),
-                status=doc.get("status") or "draft",
-                created_by=doc.get("created_by"),
-                created_at=doc.get("created_at"),
-                edited_at=doc.get("edited_at"),
-            )
+    ################################################################################
+    async def refresh_full_snapshot(self, questionnaire_id: str) -> None:
+        """
+        (Re)calcule le snapshot "full" d'un questionnaire (ex. passage au statut actif).
+        """
+        oid = self._to_object_id(questionnaire_id)
+        doc = await self._get_collection().find_one(
+            {"_id": oid}, {"questions": 1, SNAPSHOT_VERSION_FIELD: 1}
+        )
+        if not doc:
+            return
+
+        question_items = doc.get("questions", [])
+        full_questions = await self._build_full_questions(question_items)
+        await self._save_snapshot(
+            oid, question_items, full_questions, doc.get(SNAPSHOT_VERSION_FIELD)
+        )
 
-        loop = asyncio.get_event_loop()
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            return await loop.run_in_executor(executor, _sync_get_full)
+    ################################################################################
+    async def invalidate_full_snapshots(self, question_id: str) -> int:
+        """
+        Supprime le snapshot des questionnaires contenant une question modifiée et
+        incrémente leur génération, y compris sans snapshot : une lecture concurrente
+        qui a joint l'ancienne version de la question ne peut plus l'enregistrer.
+        Args:
+            question_id: ID canonique de la question (tel que stocké dans "questions.id")
+        Returns:
+            int: Nombre de questionnaires concernés
+        """
+        result = await self._get_collection().update_many(
+            {"questions.id": question_id},
+            {"$unset": {SNAPSHOT_FIELD: ""}, "$inc": {SNAPSHOT_VERSION_FIELD: 1}},
+        )
+        return result.modified_count
 
     ################################################################################
     async def update_questionnaire(
@@ -187,63 +297,34 @@ class QuestionnaireRepository:
         Returns:
             bool: True si la mise à jour a réussi
         """
+        try:
+            collection = self._get_collection()
+            oid = self._to_object_id(questionnaire_id)
 
-        def _sync_update():
-            try:
-                collection = self._get_collection()
-                clean_id = questionnaire_id.strip().strip("\"'")
-
-                try:
-                    oid = ObjectId(clean_id)
-                except ValueError:
-                    raise ValueError("Identifiant MongoDB invalide")
+            update: Dict[str, Any] = {"$set": update_data}
+            if "questions" in update_data or "status" in update_data:
+                update["$unset"] = {SNAPSHOT_FIELD: ""}
+                update["$inc"] = {SNAPSHOT_VERSION_FIELD: 1}
 
-                result = collection.update_one({"_id": oid}, {"$set": update_data})
+            result = await collection.update_one({"_id": oid}, update)
 
-                if result.matched_count == 0:
-                    raise LookupError("Questionnaire introuvable")
+            if result.matched_count == 0:
+                raise LookupError("Questionnaire introuvable")
 
-                print(
-                    f"Questionnaire {questionnaire_id} mis à jour: {result.modified_count} champ(s) modifié(s)"
-                )
-                return result.modified_count > 0
-
-            except Exception as e:
-                print(f"Erreur lors de la mise à jour: {e}")
-                raise
+            print(
+                f"Questionnaire {questionnaire_id} mis à jour: {result.modified_count} champ(s) modifié(s)"
+            )
+            return result.modified_count > 0
 
-        loop = asyncio.get_event_loop()
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(executor, _sync_update)
-            return result
+        except Exception as e:
+            print(f"Erreur lors de la mise à jour: {e}")
+            raise
 
     ################################################################################
     async def get_all_questionnaires(self) -> List[Questionnaire]:
         """
         Récupère l'ensemble des questionnaires stockés dans la collection.
         """
-        collection = self._get_collection()
-
-        def _sync_get_all():
-            cursor = collection.find()  # pas de filtre
-            results: List[Questionnaire] = []
-            for doc in cursor:
-                results.append(
-                    Questionnaire(
-                        id=str(doc["_id"]),
-                        title=doc.get("title"),
-                        subjects=doc.get("subjects", []),
-                        uses=doc.get("uses", []),
-                        questions=doc.get("questions", []),
-                        remark=doc.get("remark"),
-                        status=(doc.get("status") or "draft"),
-                        created_by=doc.get("created_by"),
-                        created_at=doc.get("created_at"),
-                        edited_at=doc.get("edited_at"),
-                    )
-                )
-            return results
-
-        loop = asyncio.get_event_loop()
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            return await loop.run_in_executor(executor, _sync_get_all)
+        # pas de filtre, sans le snapshot des questions complètes
+        cursor = self._get_collection().find({}, {SNAPSHOT_FIELD: 0})
+        return [self._doc_to_questionnaire(doc) async for doc in cursor]
@@ -7,8 +7,12 @@ from schemas.user import (
     UserResponse,
     TokenResponse,
     TokenValidationResponse,
+    UserNamesRequest,
+    UserNamesResponse,
 )
 from services.auth_service import AuthService
+from utils.password_hasher import HasherBusyError
+from utils.security import keyring
 
 router = APIRouter()
 auth_service = AuthService()
@@ -31,6 +35,7 @@ auth_service = AuthService()
         },
         400: {"description": "Données invalides ou email déjà utilisé"},
         500: {"description": "Erreur interne du serveur"},
+        503: {"description": "Trop de calculs bcrypt en cours, réessayer"},
     },
     tags=["Auth"],
 )
@@ -55,6 +60,12 @@ async def register(user_data: UserCreate) -> TokenResponse:
 
     except HTTPException:
         raise
+    except HasherBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -82,6 +93,7 @@ async def register(user_data: UserCreate) -> TokenResponse:
         401: {"description": "Identifiants incorrects"},
         400: {"description": "Données manquantes"},
         500: {"description": "Erreur interne du serveur"},
+        503: {"description": "Trop de calculs bcrypt en cours, réessayer"},
     },
     tags=["Auth"],
 )
@@ -114,6 +126,12 @@ async def login(credentials: LoginRequest) -> TokenResponse:
 
     except HTTPException:
         raise
+    except HasherBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -197,6 +215,23 @@ async def validate_token(
         )
 
 
+@router.get(
+    "/.well-known/jwks.json",
+    status_code=status.HTTP_200_OK,
+    summary="Clés publiques de vérification des tokens (JWKS)",
+    description="""
+    Publie les clés publiques du trousseau JWT (RS256 / EdDSA) avec leur `kid`,
+    pour que d'autres instances vérifient les tokens localement (`JWT_JWKS_URL`).
+    Vide en HS256 : les secrets partagés ne sont jamais publiés.
+    """,
+    responses={200: {"description": "Jeu de clés JWKS"}},
+    tags=["Auth"],
+)
+async def get_jwks() -> dict:
+    """Retourne les clés publiques au format JWKS"""
+    return keyring.public_jwks()
+
+
 @router.get(
     "/api/auth/users/{user_id}/name",
     response_model=dict,
@@ -240,6 +275,39 @@ async def get_user_name(
         )
 
 
+@router.post(
+    "/api/auth/users/names",
+    response_model=UserNamesResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Récupérer les noms de plusieurs utilisateurs",
+    description="""
+    Retourne les noms des utilisateurs demandés (1000 IDs au maximum) en une requête,
+    depuis l'annuaire id -> nom gardé en mémoire par le service.
+    Les IDs inconnus sont absents de la réponse.
+    Route sécurisée JWT.
+    """,
+    responses={
+        200: {"description": "Noms des utilisateurs retournés"},
+        401: {"description": "Token d'authentification requis"},
+        500: {"description": "Erreur interne du serveur"},
+    },
+    tags=["Auth"],
+)
+async def get_user_names(
+    payload: UserNamesRequest,
+    current_user: User = Depends(get_current_user),
+) -> UserNamesResponse:
+    """Récupère les noms de plusieurs utilisateurs par leurs IDs"""
+    try:
+        names = await AuthService.get_user_names(payload.ids)
+        return UserNamesResponse(names=names)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération des noms: {str(e)}",
+        )
+
+
 # ============================================================================
 # ENDPOINTS DE DÉVELOPPEMENT - À SUPPRIMER EN PRODUCTION
 # ============================================================================
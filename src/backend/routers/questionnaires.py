@@ -1,17 +1,24 @@
 from enum import Enum
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Path, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, status
 
 from models.user import User
 from utils.auth_dependencies import get_current_user
 from schemas.questionnaire import (
     QuestionnaireCreate,
     QuestionnaireResponse,
+    QuestionnaireListItem,
     QuestionnaireUpdate,
     QuestionnaireRandomAdd,
     QuestionnaireAddResponse,
+    QuestionnaireStratifiedAdd,
+    QuestionnaireStratifiedResponse,
+    QuestionnaireVariantsCreate,
+    QuestionnaireVariantsResponse,
 )
+from services.auth_service import AuthService
 from services.questionnaire_service import QuestionnaireService
+from utils.response_cache import questionnaire_responses
 
 router = APIRouter()
 questionnaire_service = QuestionnaireService()
@@ -83,16 +90,39 @@ class QuestionnaireFormat(str, Enum):
     full = "full"
 
 
-@router.get("/api/questionnaire/{id}/{format}", response_model=QuestionnaireResponse)
+@router.get(
+    "/api/questionnaire/{id}/{format}",
+    response_model=QuestionnaireResponse,
+    description="""Retourne un questionnaire : `short` (id et intitulé des questions) ou `full`
+    (questions complètes). La réponse porte un ETag : renvoyé dans If-None-Match, il donne
+    un 304 si le questionnaire n'a pas changé (réponse servie depuis le cache, sans lecture MongoDB).""",
+    responses={304: {"description": "Questionnaire inchangé (If-None-Match)"}},
+)
 async def get_questionnaire(
+    request: Request,
     id: str,
     format: QuestionnaireFormat,
     current_user: User = Depends(get_current_user),
 ) -> QuestionnaireResponse:
     try:
-        return await questionnaire_service.get_questionnaire_by_id(
-            id, format=format.value
-        )
+        # Réponse déjà sérialisée pour ce document et ce format ;
+        # mise en cache sous l'id du document chargé, celui des invalidations
+        cached = questionnaire_responses.get((id.strip().strip("\"'"), format.value))
+        if cached is None:
+            generation = questionnaire_responses.generation()
+            questionnaire = await questionnaire_service.get_questionnaire_by_id(
+                id, format=format.value
+            )
+            payload = QuestionnaireResponse.model_validate(
+                questionnaire.model_dump()
+            )
+            cached = questionnaire_responses.set(
+                (questionnaire.id, format.value),
+                payload.model_dump_json().encode("utf-8"),
+                generation,
+            )
+
+        return questionnaire_responses.respond(cached, request)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except LookupError as e:
@@ -237,40 +267,222 @@ async def add_random_questions(
         )
 
 
+@router.patch(
+    "/api/questionnaire/{id}/stratified",
+    response_model=QuestionnaireStratifiedResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Ajouter des questions aléatoires par quotas (sujets et usages)",
+    description="""Ajoute des questions actives tirées au hasard selon des quotas par sujet
+    (sujets contenant la valeur) et par usage : un tirage ($match + $sample) de la taille
+    du quota par compartiment, les tirages étant exécutés en parallèle.
+    Une question tirée pour plusieurs compartiments n'est ajoutée qu'une fois, au
+    compartiment le moins fourni ; un compartiment qui a perdu des questions ainsi est
+    complété par un nouveau tirage excluant les questions déjà prises. Un compartiment
+    dont le tirage ne remplit pas le quota n'a plus de questions disponibles : le bilan
+    indique alors les questions manquantes. Seul le créateur peut modifier son questionnaire.""",
+    responses={
+        200: {
+            "description": "Questions ajoutées (bilan par compartiment)",
+            "model": QuestionnaireStratifiedResponse,
+        },
+        400: {"description": "ID invalide ou données invalides"},
+        401: {"description": "Token d'authentification requis"},
+        403: {"description": "Accès refusé - seul le créateur peut modifier"},
+        404: {"description": "Questionnaire introuvable"},
+        500: {"description": "Erreur interne du serveur"},
+    },
+    tags=["Questionnaires"],
+)
+async def add_stratified_questions(
+    id: str = Path(..., description="ID du questionnaire"),
+    stratified_data: QuestionnaireStratifiedAdd = ...,
+    current_user: User = Depends(get_current_user),
+) -> QuestionnaireStratifiedResponse:
+    try:
+        user_id = current_user.id
+        if not user_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Token JWT invalide - ID utilisateur manquant",
+            )
+        if isinstance(user_id, str) and user_id.isdigit():
+            user_id = int(user_id)
+
+        message, updated, report = (
+            await questionnaire_service.add_stratified_questions_to_questionnaire(
+                id, stratified_data.quotas, user_id
+            )
+        )
+
+        return QuestionnaireStratifiedResponse(
+            message=message,
+            response=QuestionnaireResponse(
+                id=updated.id,
+                title=updated.title,
+                subjects=updated.subjects,
+                uses=updated.uses,
+                questions=updated.questions,
+                remark=updated.remark,
+                status=updated.status,
+                created_by=updated.created_by,
+                created_at=updated.created_at,
+                edited_at=updated.edited_at,
+            ),
+            buckets=report,
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de l'ajout de questions: {str(e)}",
+        )
+
+
+@router.post(
+    "/api/questionnaire/{id}/variants",
+    response_model=QuestionnaireVariantsResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Générer des variantes mélangées d'un questionnaire",
+    description="""Crée `count` variantes du questionnaire (une par étudiant) : ses questions dans un
+    ordre aléatoire, complétées de `number` questions actives tirées au hasard parmi les sujets
+    donnés (ou ceux du questionnaire). Le pool de candidats est lu une seule fois et les variantes
+    sont enregistrées en une seule écriture. Une même `seed` reproduit les mêmes variantes.
+    Seul le créateur peut générer des variantes de son questionnaire.""",
+    responses={
+        201: {
+            "description": "Variantes créées avec succès",
+            "model": QuestionnaireVariantsResponse,
+        },
+        400: {"description": "ID invalide ou données invalides"},
+        401: {"description": "Token d'authentification requis"},
+        403: {"description": "Accès refusé - seul le créateur peut générer des variantes"},
+        404: {"description": "Questionnaire introuvable"},
+        500: {"description": "Erreur interne du serveur"},
+    },
+    tags=["Questionnaires"],
+)
+async def create_questionnaire_variants(
+    id: str = Path(..., description="ID du questionnaire d'origine"),
+    variants_data: QuestionnaireVariantsCreate = ...,
+    current_user: User = Depends(get_current_user),
+) -> QuestionnaireVariantsResponse:
+    try:
+        user_id = current_user.id
+        if not user_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Token JWT invalide - ID utilisateur manquant",
+            )
+        if isinstance(user_id, str) and user_id.isdigit():
+            user_id = int(user_id)
+
+        message, seed, variants = (
+            await questionnaire_service.create_questionnaire_variants(
+                id,
+                count=variants_data.count,
+                number=variants_data.number,
+                subjects=variants_data.subjects,
+                seed=variants_data.seed,
+                user_id=user_id,
+            )
+        )
+
+        return QuestionnaireVariantsResponse(
+            message=message,
+            seed=seed,
+            variants=[
+                QuestionnaireResponse(
+                    id=v.id,
+                    title=v.title,
+                    subjects=v.subjects,
+                    uses=v.uses,
+                    questions=v.questions,
+                    remark=v.remark,
+                    status=v.status,
+                    created_by=v.created_by,
+                    created_at=v.created_at,
+                    edited_at=v.edited_at,
+                    variant_of=v.variant_of,
+                )
+                for v in variants
+            ],
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la génération des variantes: {str(e)}",
+        )
+
+
 @router.get(
     "/api/questionnaires",
-    response_model=List[QuestionnaireResponse],
+    response_model=List[QuestionnaireListItem],
+    response_model_exclude_unset=True,
     status_code=status.HTTP_200_OK,
     summary="Lister tous les questionnaires",
-    description="Retourne l'ensemble des questionnaires stockés en base. Route sécurisée JWT.",
+    description="""Retourne l'ensemble des questionnaires stockés en base.
+    `include=creator` ajoute `created_by_name`, résolu en une fois pour toute la liste. Route sécurisée JWT.""",
     responses={
         200: {"description": "Liste renvoyée avec succès"},
+        400: {"description": "Option include invalide"},
         401: {"description": "Token d'authentification requis"},
         500: {"description": "Erreur interne du serveur"},
     },
     tags=["Questionnaires"],
 )
 async def get_questionnaires(
+    include: Optional[str] = Query(
+        None, description="Données associées à ajouter : 'creator' (created_by_name)"
+    ),
     current_user: User = Depends(get_current_user),
-) -> List[QuestionnaireResponse]:
+) -> List[QuestionnaireListItem]:
+    options = {o.strip() for o in (include or "").split(",") if o.strip()}
+    if options - {"creator"}:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Options include inconnues: {', '.join(sorted(options - {'creator'}))}",
+        )
     try:
         items = await questionnaire_service.get_all_questionnaires()
-        results: List[QuestionnaireResponse] = []
+
+        # Noms des créateurs : une seule résolution pour toute la liste
+        names = {}
+        if "creator" in options:
+            names = await AuthService.get_user_names(
+                {q.created_by for q in items if q.created_by is not None}
+            )
+
+        results: List[QuestionnaireListItem] = []
         for q in items:
-            results.append(
-                QuestionnaireResponse(
-                    id=q.id,
-                    title=q.title,
-                    subjects=q.subjects,
-                    uses=q.uses,
-                    questions=q.questions,
-                    remark=q.remark,
-                    status=q.status,
-                    created_by=q.created_by,
-                    created_at=q.created_at,
-                    edited_at=q.edited_at,
-                )
+            item = QuestionnaireListItem(
+                id=q.id,
+                title=q.title,
+                subjects=q.subjects,
+                uses=q.uses,
+                questions=q.questions,
+                remark=q.remark,
+                status=q.status,
+                created_by=q.created_by,
+                created_at=q.created_at,
+                edited_at=q.edited_at,
+                variant_of=q.variant_of,
             )
+            if "creator" in options:
+                item.created_by_name = names.get(q.created_by)
+            results.append(item)
         return results
     except Exception as e:
         raise HTTPException(
@@ -5,28 +5,127 @@ from fastapi import (
     HTTPException,
     Path,
     Query,
+    Request,
+    Response,
     UploadFile,
     status,
 )
-from typing import Any, Dict, List
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+import json
 
+from models.question import Question, QuestionStatus
 from models.user import User, UserRole
 from services.csv_import_service import CSVImportService
-from utils.auth_dependencies import get_current_user
+from utils.auth_dependencies import get_current_user, require_admin
 from schemas.question import (
     AnswerCheckResponse,
     CSVImportResponse,
+    QuestionBatchRequest,
+    FacetResponse,
     QuestionCreate,
+    QuestionPartialResponse,
     QuestionResponse,
+    QuestionSearchResponse,
     QuestionUpdate,
 )
+from services.auth_service import AuthService
 from services.question_service import QuestionService
+from utils.response_cache import question_responses
+
+LIST_FIELDS = ("subject", "use", "corrects", "responses")
+# Champs de réponse calculés (include=...), hors projection MongoDB
+EXTRA_FIELDS = ("created_by_name",)
+RESPONSE_FIELDS = tuple(
+    f for f in QuestionPartialResponse.model_fields if f not in EXTRA_FIELDS
+)
+INCLUDE_OPTIONS = ("creator",)
+# Rôles autorisés à lire les réponses correctes (exclues de la projection sinon)
+CORRECTS_ROLES = ("TEACHER", "ADMIN")
 
 router = APIRouter()
 question_service = QuestionService()
 csv_import_service = CSVImportService()
 
 
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Découpe le paramètre fields= et vérifie que les champs existent.
+    """
+    if not fields:
+        return None
+    field_list = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = set(field_list) - set(RESPONSE_FIELDS)
+    if unknown:
+        raise ValueError(f"Champs inconnus: {', '.join(sorted(unknown))}")
+    return field_list
+
+
+def _parse_include(include: Optional[str]) -> List[str]:
+    """
+    Découpe le paramètre include= et vérifie les options.
+    """
+    if not include:
+        return []
+    options = [o.strip() for o in include.split(",") if o.strip()]
+    unknown = set(options) - set(INCLUDE_OPTIONS)
+    if unknown:
+        raise ValueError(f"Options include inconnues: {', '.join(sorted(unknown))}")
+    return options
+
+
+def _shows_corrects(current_user: User) -> bool:
+    """
+    Indique si le rôle de l'utilisateur permet de lire les réponses correctes.
+    """
+    return (current_user.role).upper() in CORRECTS_ROLES
+
+
+def _prepare_item(
+    item: Dict[str, Any], field_list: Optional[List[str]]
+) -> Dict[str, Any]:
+    """
+    Complète un document projeté (champs absents, dont les réponses correctes
+    exclues de la projection pour les rôles non autorisés).
+    """
+    for name in field_list or RESPONSE_FIELDS:
+        if name not in item:
+            item[name] = [] if name in LIST_FIELDS else None
+    if "status" in item and not item["status"]:
+        item["status"] = QuestionStatus.DRAFT
+    return item
+
+
+def _question_response(q: Question) -> QuestionResponse:
+    """
+    Construit la réponse d'une question (réponses correctes vides si elles n'ont pas
+    été lues pour ce rôle).
+    """
+    return QuestionResponse(
+        id=q.id,
+        question=q.question,
+        subject=q.subject,
+        use=q.use,
+        corrects=q.corrects or [],
+        responses=q.responses or [],
+        remark=q.remark,
+        status=q.status or "draft",
+        created_by=q.created_by,
+        created_at=q.created_at,
+        edited_at=q.edited_at,
+    )
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Sérialise les types non JSON natifs (dates) pour l'export NDJSON.
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
 @router.put(
     "/api/question",
     response_model=QuestionResponse,
@@ -90,9 +189,12 @@ async def create_question(
     status_code=status.HTTP_200_OK,
     summary="Récupérer une question par ID",
     description="""Retourne la question correspondant à l'id.
-    Les réponses correctes ne sont visibles que pour les rôles définis. Route sécurisée JWT.""",
+    Les réponses correctes ne sont visibles que pour les rôles définis. Route sécurisée JWT.
+    La réponse porte un ETag : renvoyé dans If-None-Match, il donne un 304 si la question
+    n'a pas changé (réponse servie depuis le cache, sans lecture MongoDB).""",
     responses={
         200: {"description": "Question trouvée", "model": QuestionResponse},
+        304: {"description": "Question inchangée (If-None-Match)"},
         400: {"description": "ID invalide"},
         401: {"description": "Token d'authentification requis"},
         404: {"description": "Question introuvable"},
@@ -101,30 +203,29 @@ async def create_question(
     tags=["Questions"],
 )
 async def get_question(
+    request: Request,
     id: str = Path(..., description="Identifiant MongoDB de la question"),
     current_user: User = Depends(get_current_user),
 ) -> QuestionResponse:
     try:
-        user_role = (current_user.role).upper()
-        q = await question_service.get_question_by_id(id)
+        show_corrects = _shows_corrects(current_user)
 
-        visible_corrects = []
-        if user_role in ["TEACHER", "ADMIN"]:
-            visible_corrects = q.corrects
+        # Réponse déjà sérialisée pour ce document et cette visibilité des corrects ;
+        # mise en cache sous l'id du document chargé, celui des invalidations
+        cached = question_responses.get((id.strip().strip("\"'"), show_corrects))
+        if cached is None:
+            generation = question_responses.generation()
+            q = await question_service.get_question_by_id(
+                id, show_corrects=show_corrects
+            )
+            payload = _question_response(q)
+            cached = question_responses.set(
+                (q.id, show_corrects),
+                payload.model_dump_json().encode("utf-8"),
+                generation,
+            )
 
-        return QuestionResponse(
-            id=q.id,
-            question=q.question,
-            subject=q.subject,
-            use=q.use,
-            corrects=visible_corrects,
-            responses=q.responses or [],
-            remark=q.remark,
-            status=q.status or "draft",
-            created_by=q.created_by,
-            created_at=q.created_at,
-            edited_at=q.edited_at,
-        )
+        return question_responses.respond(cached, request)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except LookupError as e:
@@ -136,47 +237,113 @@ async def get_question(
         )
 
 
+@router.post(
+    "/api/questions/batch",
+    response_model=List[QuestionResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Récupérer plusieurs questions par ID",
+    description="""Retourne les questions correspondant aux ids fournis (200 au maximum), en une
+    seule requête MongoDB et dans l'ordre de la liste ; les ids introuvables sont ignorés.
+    Les réponses correctes ne sont visibles que pour les rôles définis. Route sécurisée JWT.""",
+    responses={
+        200: {"description": "Questions trouvées"},
+        400: {"description": "ID invalide"},
+        401: {"description": "Token d'authentification requis"},
+        500: {"description": "Erreur interne"},
+    },
+    tags=["Questions"],
+)
+async def get_questions_batch(
+    batch: QuestionBatchRequest,
+    current_user: User = Depends(get_current_user),
+) -> List[QuestionResponse]:
+    try:
+        items = await question_service.get_questions_by_ids(
+            batch.ids, show_corrects=_shows_corrects(current_user)
+        )
+        return [_question_response(q) for q in items]
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération: {e}",
+        )
+
+
 @router.get(
     "/api/questions",
-    response_model=List[QuestionResponse],
+    response_model=List[QuestionPartialResponse],
+    response_model_exclude_unset=True,
     status_code=status.HTTP_200_OK,
-    summary="Lister toutes les questions",
-    description="""Retourne l'ensemble des questions stockées en base. 
+    summary="Lister les questions",
+    description="""Retourne les questions stockées en base, triées par identifiant.
+    Filtres optionnels sur les sujets, usages et statuts (paramètres répétables).
+    Pagination par clé : `limit` fixe la taille de page, `after` reprend après l'id donné ;
+    l'id à passer pour la page suivante est renvoyé dans l'en-tête `X-Next-After`.
+    `fields` (liste séparée par des virgules) restreint les champs renvoyés, `id` est toujours présent.
+    `include=creator` ajoute `created_by_name`, résolu en une fois pour toute la page.
     Les réponses correctes ne sont visibles que pour les rôles définis. Route sécurisée JWT.""",
     responses={
         200: {"description": "Liste renvoyée avec succès"},
+        400: {"description": "Paramètres invalides"},
         401: {"description": "Token d'authentification requis"},
         500: {"description": "Erreur interne du serveur"},
     },
     tags=["Questions"],
 )
 async def get_questions(
+    response: Response,
+    subject: Optional[List[str]] = Query(None, description="Filtre sur les sujets"),
+    use: Optional[List[str]] = Query(None, description="Filtre sur les usages"),
+    status_filter: Optional[List[QuestionStatus]] = Query(
+        None, alias="status", description="Filtre sur les statuts"
+    ),
+    after: Optional[str] = Query(
+        None, description="Id de la dernière question de la page précédente"
+    ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=1000, description="Nombre maximum de questions par page"
+    ),
+    fields: Optional[str] = Query(
+        None, description="Champs à renvoyer, séparés par des virgules"
+    ),
+    include: Optional[str] = Query(
+        None, description="Données associées à ajouter : 'creator' (created_by_name)"
+    ),
     current_user: User = Depends(get_current_user),
-) -> List[QuestionResponse]:
+) -> List[Dict[str, Any]]:
     try:
-        user_role = (current_user.role).upper()
-        items = await question_service.get_all_questions()
-        results: List[QuestionResponse] = []
-        for q in items:
-            visible_corrects = []
-            if user_role in ["TEACHER", "ADMIN"]:
-                visible_corrects = q.corrects
-            results.append(
-                QuestionResponse(
-                    id=q.id,
-                    question=q.question,
-                    subject=q.subject,
-                    use=q.use,
-                    corrects=visible_corrects,
-                    responses=q.responses or [],
-                    remark=q.remark,
-                    status=q.status,
-                    created_by=q.created_by,
-                    created_at=q.created_at,
-                    edited_at=q.edited_at,
-                )
-            )
-        return results
+        field_list = _parse_fields(fields)
+        include_options = _parse_include(include)
+        if "creator" in include_options and field_list is not None:
+            if "created_by" not in field_list:
+                field_list.append("created_by")
+
+        items, next_after = await question_service.get_questions_page(
+            subjects=subject,
+            uses=use,
+            statuses=[s.value for s in status_filter] if status_filter else None,
+            after=after,
+            limit=limit,
+            fields=field_list,
+            show_corrects=_shows_corrects(current_user),
+        )
+        if next_after:
+            response.headers["X-Next-After"] = next_after
+
+        for item in items:
+            _prepare_item(item, field_list)
+
+        # Noms des créateurs : une seule résolution pour toute la page
+        if "creator" in include_options:
+            creator_ids = {item["created_by"] for item in items} - {None}
+            names = await AuthService.get_user_names(creator_ids)
+            for item in items:
+                item["created_by_name"] = names.get(item["created_by"])
+        return items
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -184,6 +351,127 @@ async def get_questions(
         )
 
 
+@router.get(
+    "/api/questions/search",
+    response_model=List[QuestionSearchResponse],
+    response_model_exclude_unset=True,
+    status_code=status.HTTP_200_OK,
+    summary="Rechercher dans le texte des questions",
+    description="""Recherche plein texte dans l'intitulé, les propositions de réponse et la remarque
+    (index texte MongoDB, racinisation française, insensible à la casse et aux accents).
+    Les résultats sont triés par pertinence (`score`), l'intitulé pesant plus que les propositions
+    et la remarque. `"expression exacte"` et `-exclusion` sont acceptés dans `q`.
+    Pagination par `offset`/`limit` ; l'offset de la page suivante est renvoyé dans l'en-tête
+    `X-Next-Offset`. Les réponses correctes ne sont visibles que pour les rôles définis.
+    Route sécurisée JWT.""",
+    responses={
+        200: {"description": "Résultats renvoyés avec succès"},
+        400: {"description": "Paramètres invalides"},
+        401: {"description": "Token d'authentification requis"},
+        500: {"description": "Erreur interne du serveur"},
+    },
+    tags=["Questions"],
+)
+async def search_questions(
+    response: Response,
+    q: str = Query(..., min_length=1, description="Texte à rechercher"),
+    status_filter: Optional[List[QuestionStatus]] = Query(
+        None, alias="status", description="Filtre sur les statuts"
+    ),
+    offset: int = Query(0, ge=0, description="Nombre de résultats à sauter"),
+    limit: int = Query(20, ge=1, le=200, description="Nombre maximum de résultats"),
+    fields: Optional[str] = Query(
+        None, description="Champs à renvoyer, séparés par des virgules"
+    ),
+    current_user: User = Depends(get_current_user),
+) -> List[Dict[str, Any]]:
+    try:
+        field_list = _parse_fields(fields)
+
+        items, next_offset = await question_service.search_questions(
+            text=q,
+            statuses=[s.value for s in status_filter] if status_filter else None,
+            offset=offset,
+            limit=limit,
+            fields=field_list,
+            show_corrects=_shows_corrects(current_user),
+        )
+        if next_offset is not None:
+            response.headers["X-Next-Offset"] = str(next_offset)
+
+        for item in items:
+            _prepare_item(item, field_list)
+        return items
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la recherche: {e}",
+        )
+
+
+@router.get(
+    "/api/questions/export",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Exporter les questions (NDJSON)",
+    description="""Exporte la banque de questions en NDJSON (un objet JSON par ligne), en flux.
+    Le curseur MongoDB est lu par lots : la mémoire reste constante et les premières lignes
+    arrivent avant la fin de la lecture. Mêmes filtres et projection que `GET /api/questions`.
+    Les réponses correctes ne sont visibles que pour les rôles définis. Route sécurisée JWT.""",
+    responses={
+        200: {
+            "description": "Flux NDJSON des questions",
+            "content": {"application/x-ndjson": {}},
+        },
+        400: {"description": "Paramètres invalides"},
+        401: {"description": "Token d'authentification requis"},
+        500: {"description": "Erreur interne du serveur"},
+    },
+    tags=["Questions"],
+)
+async def export_questions(
+    subject: Optional[List[str]] = Query(None, description="Filtre sur les sujets"),
+    use: Optional[List[str]] = Query(None, description="Filtre sur les usages"),
+    status_filter: Optional[List[QuestionStatus]] = Query(
+        None, alias="status", description="Filtre sur les statuts"
+    ),
+    fields: Optional[str] = Query(
+        None, description="Champs à renvoyer, séparés par des virgules"
+    ),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    try:
+        field_list = _parse_fields(fields)
+        items = question_service.stream_questions(
+            subjects=subject,
+            uses=use,
+            statuses=[s.value for s in status_filter] if status_filter else None,
+            fields=field_list,
+            show_corrects=_shows_corrects(current_user),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de l'export des questions: {e}",
+        )
+
+    async def _ndjson() -> AsyncIterator[bytes]:
+        async for item in items:
+            _prepare_item(item, field_list)
+            line = json.dumps(item, default=_json_default, ensure_ascii=False)
+            yield (line + "\n").encode("utf-8")
+
+    return StreamingResponse(
+        _ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="questions.ndjson"'},
+    )
+
+
 @router.get(
     "/api/questions/subjects",
     response_model=List[str],
@@ -228,14 +516,71 @@ async def get_uses() -> List[str]:
         )
 
 
+@router.get(
+    "/api/questions/facets/{kind}",
+    response_model=List[FacetResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Lister les sujets ou usages avec leurs effectifs",
+    description="""Retourne chaque sujet (`subject`) ou usage (`use`) avec le nombre de questions
+    par statut, lu dans la collection de facettes maintenue à chaque écriture.""",
+    responses={
+        200: {"description": "Facettes renvoyées avec succès."},
+        400: {"description": "Type de facette inconnu"},
+        500: {"description": "Erreur interne du serveur"},
+    },
+    tags=["Questions"],
+)
+async def get_facets(
+    kind: str = Path(..., description="Type de facette : 'subject' ou 'use'"),
+) -> List[FacetResponse]:
+    try:
+        return await question_service.get_facets(kind)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération des facettes: {e}",
+        )
+
+
+@router.post(
+    "/api/questions/facets/rebuild",
+    response_model=dict,
+    status_code=status.HTTP_200_OK,
+    summary="Recalculer les facettes (administrateurs)",
+    description="""Recalcule entièrement la collection de facettes depuis les questions.
+    Les mises à jour incrémentales des autres instances pendant le calcul sont écrasées :
+    à lancer hors période d'écriture. Au démarrage, les facettes ne sont calculées que
+    si la collection est vide. Route réservée au rôle ADMIN.""",
+    responses={
+        200: {"description": "Facettes recalculées"},
+        403: {"description": "Accès refusé - rôle insuffisant"},
+        500: {"description": "Erreur interne du serveur"},
+    },
+    tags=["Questions"],
+)
+async def rebuild_facets(current_user: User = Depends(require_admin)) -> dict:
+    try:
+        return {"facets": await question_service.rebuild_facets()}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors du recalcul des facettes: {e}",
+        )
+
+
 @router.get(
     "/api/questions/subjects/{subject_name}",
     response_model=List[QuestionResponse],
     status_code=status.HTTP_200_OK,
     summary="Lister les questions par sujet",
-    description="Retourne les questions dont au moins un sujet contient {subject_name} (recherche insensible à la casse). Route sécurisée JWT.",
+    description="""Retourne les questions dont au moins un sujet contient {subject_name}
+    (ou commence par {subject_name} avec prefix=true). Recherche insensible à la casse,
+    aux accents et à la ponctuation, servie par index. Route sécurisée JWT.""",
     responses={
         200: {"description": "Liste renvoyée avec succès"},
+        400: {"description": "Terme sans lettre ni chiffre"},
         401: {"description": "Token d'authentification requis"},
         500: {"description": "Erreur interne du serveur"},
     },
@@ -246,34 +591,22 @@ async def get_questions_by_subject_name(
         ..., description="Sous-chaîne à rechercher dans les sujets"
     ),
     limit: int = Query(50, ge=1, le=200, description="Nombre maximum de résultats"),
+    prefix: bool = Query(
+        False, description="Recherche par préfixe plutôt que par sous-chaîne"
+    ),
     current_user: User = Depends(get_current_user),
 ) -> List[QuestionResponse]:
     try:
-        user_role = (current_user.role).upper()
         items = await question_service.get_questions_by_subject_contains(
-            subject_name, limit
+            subject_name,
+            limit,
+            prefix=prefix,
+            show_corrects=_shows_corrects(current_user),
         )
-        results: List[QuestionResponse] = []
-        for q in items:
-            visible_corrects = []
-            if user_role in ["TEACHER", "ADMIN"]:
-                visible_corrects = q.corrects
-            results.append(
-                QuestionResponse(
-                    id=q.id,
-                    question=q.question,
-                    subject=q.subject,
-                    use=q.use,
-                    corrects=visible_corrects,
-                    responses=q.responses or [],
-                    remark=q.remark,
-                    status=q.status or "draft",
-                    created_by=q.created_by,
-                    created_at=q.created_at,
-                    edited_at=q.edited_at,
-                )
-            )
+        results = [_question_response(q) for q in items]
         return results
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
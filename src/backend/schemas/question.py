@@ -41,6 +41,57 @@ class QuestionResponse(BaseModel):
     edited_at: Optional[datetime] = Field(None, description="Date de modification")
 
 
+class QuestionPartialResponse(BaseModel):
+    """
+    Schéma de sortie d'une question dont seuls les champs demandés (fields=) sont renvoyés.
+    Les champs non projetés sont absents de la réponse.
+    """
+
+    id: str = Field(..., description="Identifiant MongoDB généré automatiquement.")
+    question: Optional[str] = Field(None, description="Intitulé de la question.")
+    subject: Optional[List[str]] = Field(
+        None, description="sujets de la question (tags)."
+    )
+    use: Optional[List[str]] = Field(None, description="contextes d'utilisation")
+    corrects: Optional[List[str]] = Field(
+        None, description="Liste des réponses correctes."
+    )
+    responses: Optional[List[str]] = Field(
+        None, description="Liste des propositions de réponse."
+    )
+    remark: Optional[str] = Field(None, description="Remarque ou commentaire.")
+    status: Optional[QuestionStatus] = Field(
+        None, description="Statut de la question (draft/active/archive)"
+    )
+    created_by: Optional[int] = Field(None, description="Identifiant du créateur.")
+    created_at: Optional[datetime] = Field(None, description="Date de création")
+    edited_at: Optional[datetime] = Field(None, description="Date de modification")
+    created_by_name: Optional[str] = Field(
+        None, description="Nom du créateur (include=creator)."
+    )
+
+
+class QuestionSearchResponse(QuestionPartialResponse):
+    """
+    Résultat de la recherche plein texte : question (champs demandés) et pertinence.
+    """
+
+    score: float = Field(..., description="Pertinence du résultat (textScore).")
+
+
+class QuestionBatchRequest(BaseModel):
+    """
+    Schéma d'entrée de la lecture groupée de questions.
+    """
+
+    ids: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=200,
+        description="Identifiants MongoDB des questions (200 au maximum).",
+    )
+
+
 class QuestionUpdate(BaseModel):
     """
     Schéma d'entrée pour la mise à jour partielle d'une question.
@@ -83,6 +134,18 @@ class AnswerCheckResponse(BaseModel):
     )
 
 
+class FacetResponse(BaseModel):
+    """
+    Sujet ou usage avec le nombre de questions par statut.
+    """
+
+    value: str = Field(..., description="Sujet ou usage.")
+    counts: Dict[str, int] = Field(
+        ..., description="Nombre de questions par statut (active/draft/archive)."
+    )
+    total: int = Field(..., ge=0, description="Nombre total de questions.")
+
+
 class CSVImportResponse(BaseModel):
     """Réponse de l'import CSV"""
 
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -49,6 +49,19 @@ class QuestionnaireResponse(BaseModel):
     created_by: Optional[int] = Field(None, description="Identifiant du créateur.")
     created_at: Optional[datetime] = Field(None, description="Date de création")
     edited_at: Optional[datetime] = Field(None, description="Date de modification")
+    variant_of: Optional[str] = Field(
+        None, description="Identifiant du questionnaire d'origine (variantes)."
+    )
+
+
+class QuestionnaireListItem(QuestionnaireResponse):
+    """
+    Schéma de sortie d'un questionnaire dans la liste, avec le nom du créateur si demandé.
+    """
+
+    created_by_name: Optional[str] = Field(
+        None, description="Nom du créateur (include=creator)."
+    )
 
 
 class QuestionnaireUpdate(BaseModel):
@@ -79,3 +92,66 @@ class QuestionnaireRandomAdd(BaseModel):
 class QuestionnaireAddResponse(BaseModel):
     message: str
     response: QuestionnaireResponse
+
+
+class QuestionnaireQuota(BaseModel):
+    """
+    Quota de questions à tirer pour un sujet ou un usage.
+    """
+
+    kind: Literal["subject", "use"] = Field(
+        ..., description="Type de compartiment : sujet (contient la valeur) ou usage."
+    )
+    value: str = Field(..., min_length=1, description="Sujet ou usage ciblé.")
+    number: int = Field(..., ge=1, description="Nombre de questions à tirer.")
+
+
+class QuestionnaireStratifiedAdd(BaseModel):
+    """
+    Schéma d'entrée du tirage stratifié (quotas par sujet et par usage).
+    """
+
+    quotas: List[QuestionnaireQuota] = Field(
+        ..., min_length=1, max_length=50, description="Quotas par compartiment."
+    )
+
+
+class QuotaReport(BaseModel):
+    """
+    Résultat du tirage pour un compartiment.
+    """
+
+    kind: Literal["subject", "use"]
+    value: str
+    requested: int = Field(..., ge=0, description="Nombre de questions demandées.")
+    selected: int = Field(..., ge=0, description="Nombre de questions ajoutées.")
+    shortfall: int = Field(..., ge=0, description="Nombre de questions manquantes.")
+
+
+class QuestionnaireStratifiedResponse(BaseModel):
+    message: str
+    response: QuestionnaireResponse
+    buckets: List[QuotaReport]
+
+
+class QuestionnaireVariantsCreate(BaseModel):
+    """
+    Schéma d'entrée de la génération de variantes d'un questionnaire.
+    """
+
+    count: int = Field(..., ge=1, le=500, description="Nombre de variantes à générer.")
+    number: int = Field(
+        0, ge=0, le=200, description="Questions aléatoires ajoutées à chaque variante."
+    )
+    subjects: List[str] = Field(
+        default=[], description="Sujets des questions aléatoires (défaut : ceux du questionnaire)."
+    )
+    seed: Optional[int] = Field(
+        None, description="Graine du tirage, pour reproduire les mêmes variantes."
+    )
+
+
+class QuestionnaireVariantsResponse(BaseModel):
+    message: str
+    seed: int = Field(..., description="Graine utilisée pour le tirage.")
+    variants: List[QuestionnaireResponse]
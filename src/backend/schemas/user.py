@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, EmailStr, Field
 from models.user import UserRole
 
@@ -65,3 +65,22 @@ class TokenValidationResponse(BaseModel):
     message: Optional[str] = Field(
         None, description="Message d'erreur si le token est invalide"
     )
+
+
+class UserNamesRequest(BaseModel):
+    """Schéma pour la résolution groupée de noms d'utilisateurs"""
+
+    ids: List[int] = Field(
+        ...,
+        min_length=1,
+        max_length=1000,
+        description="IDs des utilisateurs (1000 au maximum)",
+    )
+
+
+class UserNamesResponse(BaseModel):
+    """Schéma pour la réponse de la résolution groupée de noms"""
+
+    names: Dict[int, str] = Field(
+        ..., description="Nom par ID ; les IDs inconnus sont absents"
+    )
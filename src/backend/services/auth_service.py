@@ -1,19 +1,23 @@
 import os
+import sqlite3
+import threading
+import time
 from dotenv import load_dotenv
-import jwt
-import bcrypt
-from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, Any, Tuple
+from fastapi.concurrency import run_in_threadpool
+from datetime import timedelta
+from typing import Optional, Dict, Any, Iterable, Tuple
 from models.user import User, UserRole
 from schemas.user import UserCreate, UserResponse, TokenResponse
+from utils.password_hasher import HasherBusyError, PasswordHasher
+from utils import security
 from utils.sq_database import Connection
 
 load_dotenv()
 
-# Configuration JWT
-JWT_SECRET = os.getenv("JWT_SECRET", "dev-only-unsafe-secret")
-JWT_ALG = "HS256"
-JWT_EXPIRE_MIN = 60
+# Annuaire id -> nom : rechargé après ce délai (s), pour les comptes créés hors API
+USER_NAMES_TTL = float(os.getenv("USER_NAMES_TTL", "300"))
+# Délai minimal (s) entre deux rechargements déclenchés par un id inconnu
+USER_NAMES_RELOAD_MIN = 5.0
 
 
 class AuthService(Connection):
@@ -22,8 +26,13 @@ class AuthService(Connection):
     - Authentification avec BDD (login/register)
     - Génération et validation de tokens JWT
     - Gestion des utilisateurs
+    - Annuaire id -> nom en mémoire (résolution groupée des noms)
     """
 
+    _user_names: Dict[int, str] = {}
+    _user_names_loaded_at = 0.0
+    _user_names_lock = threading.Lock()
+
     # ==================== JWT TOKEN MANAGEMENT ====================
 
     @classmethod
@@ -34,7 +43,7 @@ class AuthService(Connection):
         expires_delta: Optional[timedelta] = None,
     ) -> str:
         """
-        Crée un token JWT signé.
+        Crée un token JWT signé par la clé active du trousseau (utils.security).
 
         Args:
             subject: Identifiant principal (généralement l'email)
@@ -44,18 +53,7 @@ class AuthService(Connection):
         Returns:
             str: Token JWT encodé
         """
-        to_encode: Dict[str, Any] = {}
-        if claims:
-            to_encode.update(claims)
-
-        now = datetime.now(timezone.utc)
-        exp = now + (expires_delta or timedelta(minutes=JWT_EXPIRE_MIN))
-
-        to_encode.update(
-            {"sub": subject, "iat": int(now.timestamp()), "exp": int(exp.timestamp())}
-        )
-
-        return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALG)
+        return security.create_access_token(subject, claims, expires_delta)
 
     @staticmethod
     def decode_token(token: str) -> Optional[User]:
@@ -68,17 +66,14 @@ class AuthService(Connection):
         Returns:
             Optional[User]: Utilisateur extrait du token, ou None si invalide
         """
+        payload = security.verify_token(token)
+        if payload is None:
+            print("Token invalide ou expiré")
+            return None
         try:
-            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
             payload["password"] = "****"
             payload["isAuth"] = True
             return User.model_validate(payload)
-        except jwt.ExpiredSignatureError:
-            print("Token expiré")
-            return None
-        except jwt.InvalidTokenError as e:
-            print(f"Token invalide: {e}")
-            return None
         except Exception as e:
             print(f"Erreur lors du décodage du token: {e}")
             return None
@@ -100,30 +95,31 @@ class AuthService(Connection):
             Tuple[Optional[User], Optional[str]]: (Utilisateur, Token) ou (None, None)
         """
         try:
-            cls.connect()
-
             query = """
                 SELECT u.*, r.role as role 
                 FROM users u 
                 LEFT JOIN roles r ON u.role_id = r.id 
                 WHERE u.name = ?
             """
-            cls.cursor.execute(query, (username,))
-            result = cls.cursor.fetchone()
+            # Requête dans un thread du pool, connexion rendue avant la vérification bcrypt
+            result = await cls.run(
+                lambda cur: cur.execute(query, (username,)).fetchone()
+            )
 
             if not result:
                 print(f"Utilisateur non trouvé: {username}")
                 return None, None
 
-            # Vérification du mot de passe avec bcrypt
+            # Vérification du mot de passe avec bcrypt (pool dédié)
             stored_password = result["password"]
-            if isinstance(stored_password, str):
-                stored_password = stored_password.encode("utf-8")
-
-            if not bcrypt.checkpw(password.encode("utf-8"), stored_password):
+            if not await PasswordHasher.verify(password, stored_password):
                 print(f"Mot de passe incorrect pour: {username}")
                 return None, None
 
+            # Coût bcrypt modifié depuis le hachage : mise à jour transparente
+            if PasswordHasher.needs_rehash(stored_password):
+                await cls._rehash_password(result["id"], password)
+
             # Création de l'utilisateur authentifié
             user_data = dict(result)
             user_data.setdefault("isAuth", True)
@@ -135,11 +131,11 @@ class AuthService(Connection):
             print(f"✅ Authentification réussie: {authenticated_user.name}/{token}")
             return authenticated_user, token
 
+        except HasherBusyError:
+            raise
         except Exception as err:
             print(f"❌ Erreur lors de l'authentification: {err}")
             return None, None
-        finally:
-            cls.close()
 
     @classmethod
     async def register(cls, user_data: UserCreate) -> Optional[TokenResponse]:
@@ -153,29 +149,31 @@ class AuthService(Connection):
             Optional[TokenResponse]: Réponse avec token et user, ou None si échec
         """
         try:
-            cls.connect()
-            print("📡 Connexion BDD réussie")
-
-            # Vérification de l'email unique
-            if await cls._email_exists(user_data.email):
+            # Vérification de l'email unique et récupération du role_id
+            email_exists, role_id = await cls.run(
+                lambda cur: (
+                    cls._email_exists(cur, user_data.email),
+                    cls._get_role_id(cur, user_data.role.value),
+                )
+            )
+            if email_exists:
                 print(f"⚠️ Email déjà utilisé: {user_data.email}")
                 return None
-
-            # Hash du mot de passe
-            hashed_password = cls._hash_password(user_data.password)
-
-            # Récupération du role_id
-            role_id = await cls._get_role_id(user_data.role.value)
             if not role_id:
                 raise RuntimeError(f"Rôle '{user_data.role.value}' introuvable")
 
-            # Insertion en base
-            user_id = await cls._insert_user(
-                user_data.name, user_data.email, hashed_password, role_id
+            # Hash du mot de passe (hors connexion : bcrypt est lent)
+            hashed_password = await PasswordHasher.hash(user_data.password)
+
+            # Insertion en base (l'unicité de l'email est garantie par la table)
+            user_id = await cls.run(
+                lambda cur: cls._insert_user(
+                    cur, user_data.name, user_data.email, hashed_password, role_id
+                )
             )
 
-            cls.connexion.commit()
             print(f"✅ Utilisateur créé avec ID: {user_id}")
+            cls._remember_user_name(user_id, user_data.name)
 
             # Récupération de l'utilisateur créé
             created_user = await cls._get_user_by_id(user_id)
@@ -196,13 +194,11 @@ class AuthService(Connection):
                 ),
             )
 
+        except HasherBusyError:
+            raise
         except Exception as err:
             print(f"❌ Erreur lors de la création du compte: {err}")
-            if cls.connexion:
-                cls.connexion.rollback()
             return None
-        finally:
-            cls.close()
 
     # ==================== TEST MODE (sans BDD) ====================
 
@@ -243,21 +239,47 @@ class AuthService(Connection):
 
     @classmethod
     async def get_user_name(cls, user_id: int) -> str:
-        """Récupère le nom d'un utilisateur par son ID."""
-        try:
-            cls.connect()
-            query = "SELECT name FROM users WHERE id = ?"
-            cls.cursor.execute(query, (user_id,))
-            result = cls.cursor.fetchone()
-
-            if result and "name" in result.keys():
-                return result["name"]
-            return "Inconnu"
-        except Exception as err:
-            print(f"❌ Erreur getUserName: {err}")
-            return "Inconnu"
-        finally:
-            cls.close()
+        """Récupère le nom d'un utilisateur par son ID (annuaire en mémoire)."""
+        names = await cls.get_user_names([user_id])
+        return names.get(user_id, "Inconnu")
+
+    @classmethod
+    async def get_user_names(cls, user_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Résout plusieurs IDs en noms depuis l'annuaire en mémoire.
+        L'annuaire est rechargé (une requête) s'il a expiré, ou si un ID est inconnu
+        et que le dernier chargement date de plus de USER_NAMES_RELOAD_MIN secondes.
+
+        Returns:
+            Dict[int, str]: Noms des utilisateurs trouvés (les IDs inconnus sont absents)
+        """
+        wanted = set(user_ids)
+        age = time.monotonic() - cls._user_names_loaded_at
+        unknown = wanted - cls._user_names.keys()
+        if age > USER_NAMES_TTL or (unknown and age > USER_NAMES_RELOAD_MIN):
+            try:
+                await run_in_threadpool(cls._load_user_names)
+            except Exception as err:
+                print(f"❌ Erreur chargement de l'annuaire: {err}")
+
+        names = cls._user_names
+        return {user_id: names[user_id] for user_id in wanted if user_id in names}
+
+    @classmethod
+    def _load_user_names(cls) -> None:
+        """Charge l'annuaire complet id -> nom (une seule requête, appel bloquant)."""
+        with cls._user_names_lock:
+            with cls.cursor() as cur:
+                cur.execute("SELECT id, name FROM users")
+                names = {row["id"]: row["name"] for row in cur.fetchall()}
+            cls._user_names = names
+            cls._user_names_loaded_at = time.monotonic()
+
+    @classmethod
+    def _remember_user_name(cls, user_id: int, name: str) -> None:
+        """Ajoute un utilisateur créé à l'annuaire sans le recharger."""
+        with cls._user_names_lock:
+            cls._user_names = {**cls._user_names, user_id: name}
 
     # ==================== PRIVATE HELPER METHODS ====================
 
@@ -276,60 +298,64 @@ class AuthService(Connection):
 
         return cls.create_access_token(subject=user.email, claims=token_claims)
 
-    @staticmethod
-    def _hash_password(password: str) -> str:
-        """Hash un mot de passe avec bcrypt."""
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
-        return hashed.decode("utf-8")
-
     @classmethod
-    async def _email_exists(cls, email: str) -> bool:
+    async def _rehash_password(cls, user_id: int, password: str) -> None:
+        """Rehache un mot de passe au coût courant (échec sans effet sur la connexion)."""
+        try:
+            hashed_password = await PasswordHasher.hash(password)
+            await cls.run(
+                lambda cur: cur.execute(
+                    "UPDATE users SET password = ? WHERE id = ?",
+                    (hashed_password, user_id),
+                )
+            )
+            PasswordHasher.record_rehash()
+            print(f"🔁 Mot de passe rehaché pour l'utilisateur {user_id}")
+        except Exception as err:
+            print(f"⚠️ Rehachage impossible pour l'utilisateur {user_id}: {err}")
+
+    @staticmethod
+    def _email_exists(cur: sqlite3.Cursor, email: str) -> bool:
         """Vérifie si un email existe déjà en base."""
         query = "SELECT COUNT(*) as count FROM users WHERE email = ?"
-        cls.cursor.execute(query, (email,))
-        result = cls.cursor.fetchone()
+        cur.execute(query, (email,))
+        result = cur.fetchone()
         return result and result["count"] > 0
 
-    @classmethod
-    async def _get_role_id(cls, role_name: str) -> Optional[int]:
+    @staticmethod
+    def _get_role_id(cur: sqlite3.Cursor, role_name: str) -> Optional[int]:
         """Récupère l'ID d'un rôle par son nom."""
         query = "SELECT id FROM Roles WHERE role = ?"
-        cls.cursor.execute(query, (role_name,))
-        result = cls.cursor.fetchone()
+        cur.execute(query, (role_name,))
+        result = cur.fetchone()
         return result["id"] if result else None
 
-    @classmethod
-    async def _insert_user(
-        cls, name: str, email: str, hashed_password: str, role_id: int
+    @staticmethod
+    def _insert_user(
+        cur: sqlite3.Cursor, name: str, email: str, hashed_password: str, role_id: int
     ) -> int:
         """Insère un nouvel utilisateur en base."""
         query = """
             INSERT INTO users (name, email, password, role_id)
             VALUES (?, ?, ?, ?)
         """
-        cls.cursor.execute(query, (name, email, hashed_password, role_id))
-        return cls.cursor.lastrowid
+        cur.execute(query, (name, email, hashed_password, role_id))
+        return cur.lastrowid
 
     @classmethod
     async def _get_user_by_id(cls, user_id: int) -> Optional[User]:
         """Récupère un utilisateur complet par son ID."""
-        try:
-            cls.connect()
-            query = """
-                SELECT u.*, r.role as role 
-                FROM users u 
-                LEFT JOIN roles r ON u.role_id = r.id 
-                WHERE u.id = ?
-            """
-            cls.cursor.execute(query, (user_id,))
-            result = cls.cursor.fetchone()
-
-            if result:
-                user_data = dict(result)
-                user_data.setdefault("isAuth", False)
-                user_data["password"] = "[PROTECTED]"
-                return User(**user_data)
-            return None
-        finally:
-            cls.close()
+        query = """
+            SELECT u.*, r.role as role 
+            FROM users u 
+            LEFT JOIN roles r ON u.role_id = r.id 
+            WHERE u.id = ?
+        """
+        result = await cls.run(lambda cur: cur.execute(query, (user_id,)).fetchone())
+
+        if result:
+            user_data = dict(result)
+            user_data.setdefault("isAuth", False)
+            user_data["password"] = "[PROTECTED]"
+            return User(**user_data)
+        return None
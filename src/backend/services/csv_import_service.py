@@ -27,9 +27,18 @@ class CSVImportService:
         content = await file.read()
         csv_content = content.decode("utf-8")
 
+        # Sujets déjà en base : les fautes sont corrigées vers la banque existante
+        canonicalizer = None
+        if fix_subjects:
+            canonicalizer = await self.question_service.get_subject_canonicalizer(
+                subject_threshold
+            )
+
         # Traitement du CSV
         processor = CSVQuestionProcessor(
-            fix_subjects=fix_subjects, subject_threshold=subject_threshold
+            fix_subjects=fix_subjects,
+            subject_threshold=subject_threshold,
+            canonicalizer=canonicalizer,
         )
 
         questions_data = processor.process_csv_content(csv_content)
@@ -72,6 +81,9 @@ class CSVImportService:
                     }
                 )
 
+        # Les sujets/usages importés doivent apparaître immédiatement dans les filtres
+        self.question_service.invalidate_distinct_cache()
+
         return CSVImportResponse(
             success=len(errors) < len(questions_data),
             imported=imported_count,
@@ -1,18 +1,48 @@
+import os
 from datetime import datetime
-from typing import List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from zoneinfo import ZoneInfo
 from models.question import Question, QuestionStatus
 from schemas.question import QuestionCreate, QuestionUpdate
 from repositories.question_repository import QuestionRepository
+from repositories.questionnaire_repository import (
+    SNAPSHOT_QUESTION_FIELDS,
+    QuestionnaireRepository,
+)
+from utils.cache import TTLCache
+from utils.response_cache import question_responses, questionnaire_responses
+from utils.subject_canonicalizer import SubjectCanonicalizer
+from utils.text_normalization import normalize_text
 
 
 class QuestionService:
     """
     Service pour la gestion des questions.
+    Les listes distinctes (sujets, usages) sont mises en cache, partagé par toutes
+    les instances du service, et invalidées à chaque écriture.
     """
 
+    _distinct_cache = TTLCache(
+        ttl=float(os.getenv("DISTINCT_CACHE_TTL", "300")), name="distinct"
+    )
+
     def __init__(self):
         self.repository = QuestionRepository()
+        self.questionnaire_repository = QuestionnaireRepository()
+
+    @classmethod
+    def invalidate_distinct_cache(cls) -> None:
+        """
+        Vide le cache des sujets et usages distincts.
+        """
+        cls._distinct_cache.invalidate()
+
+    @classmethod
+    def get_cache_stats(cls) -> Dict[str, Any]:
+        """
+        Retourne les compteurs du cache des sujets et usages distincts.
+        """
+        return cls._distinct_cache.get_stats()
 
     ################################################################################
     async def create_question(
@@ -54,22 +84,28 @@ class QuestionService:
         )
 
         generated_id = await self.repository.insert_question(question)
+        self.invalidate_distinct_cache()
 
         return question.model_copy(update={"id": generated_id})
 
     ################################################################################
-    async def get_question_by_id(self, question_id: str) -> Question:
+    async def get_question_by_id(
+        self, question_id: str, show_corrects: bool = True
+    ) -> Question:
         """
         Retourne une question depuis son id MongoDB.
 
         Args:
             question_id: id
+            show_corrects: False pour ne pas lire les réponses correctes
 
         Returns:
             Question: L'objet Question recherché
         """
 
-        question = await self.repository.get_question_by_id(question_id)
+        question = await self.repository.get_question_by_id(
+            question_id, show_corrects=show_corrects
+        )
 
         if question is None:
             raise LookupError("Question introuvable")
@@ -77,6 +113,17 @@ class QuestionService:
             question.status = QuestionStatus.DRAFT
         return question
 
+    ################################################################################
+    async def get_questions_by_ids(
+        self, question_ids: List[str], show_corrects: bool = True
+    ) -> List[Question]:
+        """
+        Retourne les questions demandées, dans l'ordre des identifiants (introuvables ignorées).
+        """
+        return await self.repository.get_questions_by_ids(
+            question_ids, show_corrects=show_corrects
+        )
+
     ################################################################################
     async def get_all_questions(self) -> List[Question]:
         """
@@ -84,31 +131,236 @@ class QuestionService:
         """
         return await self.repository.get_all_questions()
 
+    ################################################################################
+    async def get_questions_page(
+        self,
+        subjects: Optional[List[str]] = None,
+        uses: Optional[List[str]] = None,
+        statuses: Optional[List[str]] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        show_corrects: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Retourne une page de questions (documents projetés) et le curseur suivant.
+
+        Returns:
+            tuple: (questions, id de la dernière question si la page est pleine, sinon None)
+        """
+        items = await self.repository.find_questions(
+            subjects=subjects,
+            uses=uses,
+            statuses=statuses,
+            after=after,
+            limit=limit,
+            fields=fields,
+            show_corrects=show_corrects,
+        )
+        next_after = items[-1]["id"] if limit and len(items) == limit else None
+        return items, next_after
+
+    ################################################################################
+    async def search_questions(
+        self,
+        text: str,
+        statuses: Optional[List[str]] = None,
+        offset: int = 0,
+        limit: int = 20,
+        fields: Optional[List[str]] = None,
+        show_corrects: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Recherche plein texte dans l'intitulé, les propositions et la remarque.
+
+        Returns:
+            tuple: (questions triées par pertinence, offset de la page suivante si la page est pleine, sinon None)
+        """
+        text = (text or "").strip()
+        if not text:
+            raise ValueError("Le texte à rechercher est vide")
+
+        items = await self.repository.search_questions_text(
+            text=text,
+            statuses=statuses,
+            offset=offset,
+            limit=limit,
+            fields=fields,
+            show_corrects=show_corrects,
+        )
+        next_offset = offset + limit if len(items) == limit else None
+        return items, next_offset
+
+    ################################################################################
+    def stream_questions(
+        self,
+        subjects: Optional[List[str]] = None,
+        uses: Optional[List[str]] = None,
+        statuses: Optional[List[str]] = None,
+        fields: Optional[List[str]] = None,
+        show_corrects: bool = True,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Retourne un itérateur asynchrone sur les questions (lecture par lots).
+        """
+        return self.repository.iter_questions(
+            subjects=subjects,
+            uses=uses,
+            statuses=statuses,
+            fields=fields,
+            show_corrects=show_corrects,
+        )
+
     ################################################################################
     async def get_subjects(self) -> List[str]:
         """
-        Retourne la liste des sujets distincts.
+        Retourne la liste des sujets distincts (mise en cache).
+        """
+        subjects = self._distinct_cache.get("subjects")
+        if subjects is None:
+            # Génération lue avant la requête : une liste lue avant une
+            # invalidation concurrente n'est pas mise en cache
+            generation = self._distinct_cache.generation()
+            subjects = await self.repository.get_distinct_subjects()
+            self._distinct_cache.set("subjects", subjects, generation=generation)
+        return list(subjects)
+
+    ################################################################################
+    async def get_subject_canonicalizer(self, threshold: float) -> SubjectCanonicalizer:
+        """
+        Retourne l'index des sujets existants pour corriger les sujets importés.
+        L'index est construit depuis les facettes (sujets les plus utilisés d'abord,
+        prioritaires à score égal), ou les sujets distincts à défaut, et mis en cache
+        avec eux ; l'appelant reçoit une copie qu'il peut compléter.
         """
-        return await self.repository.get_distinct_subjects()
+        key = ("subject_index", threshold)
+        index = self._distinct_cache.get(key)
+        if index is None:
+            generation = self._distinct_cache.generation()
+            facets = await self.repository.get_facets("subject")
+            if facets:
+                ranked = sorted(facets, key=lambda f: f["total"], reverse=True)
+                subjects = [f["value"] for f in ranked]
+            else:
+                subjects = await self.get_subjects()
+            index = SubjectCanonicalizer(threshold)
+            index.update(subjects)
+            self._distinct_cache.set(key, index, generation=generation)
+        return index.copy()
 
     ################################################################################
     async def get_uses(self) -> List[str]:
         """
-        Retourne la liste des uses distincts.
+        Retourne la liste des uses distincts (mise en cache).
+        """
+        uses = self._distinct_cache.get("uses")
+        if uses is None:
+            generation = self._distinct_cache.generation()
+            uses = await self.repository.get_distinct_uses()
+            self._distinct_cache.set("uses", uses, generation=generation)
+        return list(uses)
+
+    ################################################################################
+    async def get_facets(self, kind: str) -> List[Dict[str, Any]]:
+        """
+        Retourne les sujets ou usages avec leurs compteurs par statut.
         """
-        return await self.repository.get_distinct_uses()
+        return await self.repository.get_facets(kind)
+
+    ################################################################################
+    async def get_active_pool_size(self, subjects: List[str]) -> int:
+        """
+        Estime, sans parcourir les questions, le nombre de questions actives dont
+        un sujet contient l'un des termes donnés (majorant : une question à
+        plusieurs sujets correspondants est comptée plusieurs fois).
+        Raises:
+            ValueError: Si un terme est vide après normalisation (ex. "?", "—")
+        """
+        terms = []
+        for subject in subjects:
+            if not subject:
+                continue
+            term = normalize_text(subject)
+            if not term:
+                raise ValueError(
+                    f"Terme de sujet '{subject}' invalide : aucune lettre ni chiffre"
+                )
+            terms.append(term)
+        return await self.repository.count_active_by_subject_terms(terms)
+
+    ################################################################################
+    async def rebuild_facets(self) -> int:
+        """
+        Recalcule les compteurs de facettes depuis la collection des questions.
+        Étape d'administration : écrase les incréments concurrents des autres instances.
+        """
+        return await self.repository.rebuild_facets()
+
+    ################################################################################
+    async def ensure_facets(self) -> int:
+        """
+        Au démarrage : recalcule les facettes si la collection est vide ou si ses
+        compteurs ne correspondent plus aux questions (import direct en base),
+        sinon complète les formes normalisées manquantes.
+        Returns:
+            int: Nombre de facettes calculées ou complétées
+        """
+        if await self.repository.count_facets() == 0:
+            return await self.repository.rebuild_facets()
+        if not await self.repository.facets_match_questions():
+            print("Facettes désynchronisées des questions : recalcul")
+            return await self.repository.rebuild_facets()
+        return await self.repository.backfill_facet_norms()
 
     ################################################################################
     async def get_questions_by_subject_contains(
-        self, subject_name: str, limit: int = 50
+        self,
+        subject_name: str,
+        limit: int = 50,
+        prefix: bool = False,
+        show_corrects: bool = True,
     ) -> List[Question]:
         """
-        Retourne les questions dont au moins un sujet contient ***.
+        Retourne les questions dont au moins un sujet contient *** (ou commence par ***
+        si prefix=True), sans tenir compte de la casse, des accents ni de la ponctuation.
         """
         return await self.repository.search_questions_by_subject_substring(
-            subject_name=subject_name, limit=limit
+            subject_name=subject_name,
+            limit=limit,
+            prefix=prefix,
+            show_corrects=show_corrects,
+        )
+
+    ################################################################################
+    async def sample_active_questions(
+        self, subjects: List[str], exclude_ids: List[str], size: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Tire au hasard jusqu'à 'size' questions actives des sujets donnés (hors exclusions).
+        """
+        return await self.repository.sample_active_questions(
+            subjects=subjects, exclude_ids=exclude_ids, size=size
+        )
+
+    ################################################################################
+    async def sample_active_questions_by_buckets(
+        self, buckets: List[Tuple[str, str, int]], exclude_ids: List[str]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Tire au hasard des questions actives par compartiment (sujet ou usage),
+        un tirage borné par compartiment, en parallèle.
+        """
+        return await self.repository.sample_active_questions_by_buckets(
+            buckets=buckets, exclude_ids=exclude_ids
         )
 
+    ################################################################################
+    async def backfill_subject_search_fields(self) -> int:
+        """
+        Complète les champs de recherche des sujets manquants.
+        """
+        return await self.repository.backfill_subject_search_fields()
+
     ################################################################################
 
     async def update_question(
@@ -145,6 +397,18 @@ class QuestionService:
 
         # Effectuer la mise à jour
         await self.repository.update_question(question_id, update_data)
+        self.invalidate_distinct_cache()
+
+        # Réponses HTTP en cache : la question, et les questionnaires complets
+        # (qui en recopient le contenu)
+        question_responses.invalidate_document(existing_question.id)
+
+        # Les snapshots des questionnaires contenant la question deviennent obsolètes
+        if any(field in update_data for field in SNAPSHOT_QUESTION_FIELDS):
+            await self.questionnaire_repository.invalidate_full_snapshots(
+                existing_question.id
+            )
+            questionnaire_responses.invalidate_if(lambda key: key[1] == "full")
 
         # Retourner la question mise à jour
         return await self.repository.get_question_by_id(question_id)
@@ -1,16 +1,24 @@
-import random
 from services.question_service import QuestionService
-from models.question import QuestionStatus
+import random
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, List, Optional
 from zoneinfo import ZoneInfo
 from models.questionnaire import Questionnaire, QuestionnaireStatus
 from schemas.questionnaire import (
     QuestionnaireCreate,
+    QuestionnaireQuota,
     QuestionnaireResponse,
     QuestionnaireUpdate,
 )
 from repositories.questionnaire_repository import QuestionnaireRepository
+from utils.response_cache import questionnaire_responses
+from utils.single_flight import SingleFlight
+
+# Nombre maximal de questions d'un tirage stratifié
+MAX_STRATIFIED_QUESTIONS = 500
+
+# Taille maximale du pool de candidats commun aux variantes
+VARIANTS_POOL_SIZE = 5000
 
 
 class QuestionnaireService:
@@ -18,10 +26,20 @@ class QuestionnaireService:
     Service pour la gestion des questionnaires.
     """
 
+    # Lectures "full" concurrentes d'un même questionnaire regroupées en une seule
+    _full_flight = SingleFlight(name="questionnaire_full")
+
     def __init__(self):
         self.repository = QuestionnaireRepository()
         self.question_service = QuestionService()
 
+    @classmethod
+    def get_flight_stats(cls) -> Dict[str, Any]:
+        """
+        Retourne les statistiques de regroupement des lectures "full".
+        """
+        return cls._full_flight.get_stats()
+
     ################################################################################
     async def create_questionnaire(
         self, questionnaire_data: QuestionnaireCreate, user_id: int
@@ -61,6 +79,10 @@ class QuestionnaireService:
 
         generated_id = await self.repository.insert_questionnaire(questionnaire)
 
+        # Questionnaire actif : matérialisation immédiate des questions complètes
+        if status == QuestionnaireStatus.ACTIVE and questionnaire.questions:
+            await self.repository.refresh_full_snapshot(generated_id)
+
         return questionnaire.model_copy(update={"id": generated_id})
 
     ################################################################################
@@ -85,8 +107,14 @@ class QuestionnaireService:
             return questionnaire
 
         elif format == "full":
-            questionnaire = await self.repository.get_full_questionnaire_by_id(
-                questionnaire_id
+            # Clé incluant la génération du cache de réponses : une lecture commencée
+            # avant une écriture n'est pas partagée avec les appelants arrivés après
+            questionnaire = await self._full_flight.do(
+                (
+                    questionnaire_id.strip().strip("\"'"),
+                    questionnaire_responses.generation(),
+                ),
+                lambda: self.repository.get_full_questionnaire_by_id(questionnaire_id),
             )
             if questionnaire is None:
                 raise LookupError("Questionnaire introuvable")
@@ -140,10 +168,20 @@ class QuestionnaireService:
         )
 
         # Effectuer la mise à jour - écrasement de la liste antérieure des questions
+        # (le snapshot "full" est invalidé si les questions ou le statut changent)
         await self.repository.update_questionnaire(questionnaire_id, update_data)
+        questionnaire_responses.invalidate_document(existing_questionnaire.id)
+
+        updated = await self.repository.get_short_questionnaire_by_id(questionnaire_id)
+
+        # Passage (ou maintien) au statut actif : snapshot recalculé
+        if (
+            "questions" in update_data or "status" in update_data
+        ) and updated.status == QuestionnaireStatus.ACTIVE:
+            await self.repository.refresh_full_snapshot(questionnaire_id)
 
         # Retourner le questionnaire mis à jour
-        return await self.repository.get_short_questionnaire_by_id(questionnaire_id)
+        return updated
 
     ################################################################################
     async def get_all_questionnaires(self) -> List[Questionnaire]:
@@ -184,41 +222,34 @@ class QuestionnaireService:
             raise PermissionError("Seul le créateur du questionnaire peut le modifier")
 
         # Extraire les IDs existants
-        existing_ids = {q.id for q in existing_questionnaire.questions}
+        existing_ids = [q.id for q in existing_questionnaire.questions]
 
-        # Phase 1 : Construction du pool de candidats (QItem directement, dédupliqués)
+        # Tirage côté serveur ($match statut/sujets/exclusions puis $sample)
         from models.questionnaire import QItem
 
-        candidates_dict = {}
-        for subject in subjects:
-            questions = await self.question_service.get_questions_by_subject_contains(
-                subject, limit=1000
+        # Taille du pool lue sur les facettes (majorant, un document par sujet) :
+        # sans question active correspondante, ni $sample ni écriture
+        pool_size = await self.question_service.get_active_pool_size(subjects)
+        sampled = []
+        if pool_size > 0:
+            sampled = await self.question_service.sample_active_questions(
+                subjects=subjects, exclude_ids=existing_ids, size=min(number, pool_size)
             )
-            for q in questions:
-                # Filtrer : ACTIVE et pas déjà dans le questionnaire
-                if (
-                    q.status == QuestionStatus.ACTIVE
-                    and q.id not in existing_ids
-                    and q.id not in candidates_dict
-                ):
-                    candidates_dict[q.id] = QItem(id=q.id, question=q.question)
-
-        candidates = list(candidates_dict.values())
-
-        # Phase 2 : Sélection aléatoire
-        selected_count = min(number, len(candidates))
-        new_qitems = (
-            random.sample(candidates, selected_count) if selected_count > 0 else []
-        )
+        new_qitems = [QItem(id=q["id"], question=q["question"]) for q in sampled]
+        selected_count = len(new_qitems)
 
         # Mise à jour du questionnaire
-        updated_questions = existing_questionnaire.questions + new_qitems
-        update_data = {
-            "questions": [q.model_dump() for q in updated_questions],
-            "edited_at": datetime.now(ZoneInfo("Europe/Paris")).replace(microsecond=0),
-        }
-
-        await self.repository.update_questionnaire(questionnaire_id, update_data)
+        if new_qitems:
+            updated_questions = existing_questionnaire.questions + new_qitems
+            update_data = {
+                "questions": [q.model_dump() for q in updated_questions],
+                "edited_at": datetime.now(ZoneInfo("Europe/Paris")).replace(
+                    microsecond=0
+                ),
+            }
+
+            await self.repository.update_questionnaire(questionnaire_id, update_data)
+            questionnaire_responses.invalidate_document(existing_questionnaire.id)
 
         # Construction du message
         if selected_count < number:
@@ -227,8 +258,213 @@ class QuestionnaireService:
             message = f"{selected_count} question(s) ajoutée(s) avec succès"
 
         # Retourner le questionnaire mis à jour
+        if not new_qitems:
+            return message, existing_questionnaire
         updated_questionnaire = await self.repository.get_short_questionnaire_by_id(
             questionnaire_id
         )
 
         return message, updated_questionnaire
+
+    ################################################################################
+    async def add_stratified_questions_to_questionnaire(
+        self,
+        questionnaire_id: str,
+        quotas: List[QuestionnaireQuota],
+        user_id: int,
+    ) -> tuple[str, Questionnaire, List[Dict[str, Any]]]:
+        """
+        Ajoute des questions aléatoires à un questionnaire selon des quotas par sujet
+        et par usage : un tirage par compartiment, en parallèle, puis dédoublonnage
+        entre compartiments et nouveaux tirages pour les compartiments lésés.
+
+        Args:
+            questionnaire_id: ID du questionnaire
+            quotas: Quotas par compartiment (sujet ou usage)
+            user_id: ID de l'utilisateur
+
+        Returns:
+            tuple: (message, questionnaire mis à jour, bilan par compartiment)
+        """
+        existing_questionnaire = await self.repository.get_short_questionnaire_by_id(
+            questionnaire_id
+        )
+        if existing_questionnaire is None:
+            raise LookupError("Questionnaire introuvable")
+
+        if existing_questionnaire.created_by != user_id:
+            raise PermissionError("Seul le créateur du questionnaire peut le modifier")
+
+        total = sum(quota.number for quota in quotas)
+        if total > MAX_STRATIFIED_QUESTIONS:
+            raise ValueError(
+                f"Au plus {MAX_STRATIFIED_QUESTIONS} questions par tirage ({total} demandées)"
+            )
+
+        existing_ids = [q.id for q in existing_questionnaire.questions]
+
+        # Un tirage de la taille du quota par compartiment, en parallèle. Une question
+        # sortie dans deux compartiments revient au moins fourni (les petits sujets ne
+        # sont pas évincés par les grands) ; les compartiments lésés (tirage complet mais
+        # doublons) sont retirés en excluant les questions déjà prises. Chaque tour
+        # complète au moins un compartiment.
+        taken = set(existing_ids)
+        selected: List[List[Dict[str, Any]]] = [[] for _ in quotas]
+        pending = list(range(len(quotas)))
+        while pending:
+            requested = [quotas[i].number - len(selected[i]) for i in pending]
+            samples = await self.question_service.sample_active_questions_by_buckets(
+                buckets=[
+                    (quotas[i].kind, quotas[i].value, size)
+                    for i, size in zip(pending, requested)
+                ],
+                exclude_ids=list(taken),
+            )
+            retry = []
+            rounds = sorted(
+                zip(pending, requested, samples), key=lambda r: (len(r[2]), r[0])
+            )
+            for i, size, sample in rounds:
+                for candidate in sample:
+                    if candidate["id"] not in taken:
+                        taken.add(candidate["id"])
+                        selected[i].append(candidate)
+                if len(sample) == size and len(selected[i]) < quotas[i].number:
+                    retry.append(i)
+            pending = sorted(retry)
+
+        from models.questionnaire import QItem
+
+        new_qitems = [
+            QItem(id=q["id"], question=q["question"])
+            for bucket in selected
+            for q in bucket
+        ]
+        report = [
+            {
+                "kind": quota.kind,
+                "value": quota.value,
+                "requested": quota.number,
+                "selected": len(bucket),
+                "shortfall": quota.number - len(bucket),
+            }
+            for quota, bucket in zip(quotas, selected)
+        ]
+
+        if new_qitems:
+            updated_questions = existing_questionnaire.questions + new_qitems
+            update_data = {
+                "questions": [q.model_dump() for q in updated_questions],
+                "edited_at": datetime.now(ZoneInfo("Europe/Paris")).replace(
+                    microsecond=0
+                ),
+            }
+            await self.repository.update_questionnaire(questionnaire_id, update_data)
+            questionnaire_responses.invalidate_document(existing_questionnaire.id)
+
+        # Construction du message
+        missing = [r for r in report if r["shortfall"] > 0]
+        if missing:
+            details = ", ".join(
+                f"{r['kind']} '{r['value']}' ({r['shortfall']})" for r in missing
+            )
+            message = f"{len(new_qitems)} question(s) ajoutée(s) sur {total} demandée(s) ; manquantes : {details}"
+        else:
+            message = f"{len(new_qitems)} question(s) ajoutée(s) avec succès"
+
+        updated_questionnaire = await self.repository.get_short_questionnaire_by_id(
+            questionnaire_id
+        )
+
+        return message, updated_questionnaire, report
+
+    ################################################################################
+    async def create_questionnaire_variants(
+        self,
+        questionnaire_id: str,
+        count: int,
+        number: int,
+        subjects: List[str],
+        seed: Optional[int],
+        user_id: int,
+    ) -> tuple[str, int, List[Questionnaire]]:
+        """
+        Génère des variantes mélangées d'un questionnaire (une par étudiant).
+        Chaque variante reprend les questions du questionnaire dans un ordre aléatoire,
+        complétées de 'number' questions actives tirées d'un pool commun, récupéré
+        une seule fois ; les variantes sont enregistrées en un seul insert_many.
+
+        Args:
+            questionnaire_id: ID du questionnaire d'origine
+            count: Nombre de variantes
+            number: Questions aléatoires ajoutées à chaque variante
+            subjects: Sujets du pool (défaut : sujets du questionnaire)
+            seed: Graine du tirage (générée si absente)
+            user_id: ID de l'utilisateur
+
+        Returns:
+            tuple: (message, graine utilisée, variantes créées)
+        """
+        base = await self.repository.get_short_questionnaire_by_id(questionnaire_id)
+        if base is None:
+            raise LookupError("Questionnaire introuvable")
+
+        if base.created_by != user_id:
+            raise PermissionError(
+                "Seul le créateur du questionnaire peut en générer des variantes"
+            )
+
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**31)
+        rng = random.Random(seed)
+
+        from models.questionnaire import QItem
+
+        # Pool commun, trié par id : le tirage ne dépend que de la graine
+        # (tant que le pool ne dépasse pas VARIANTS_POOL_SIZE)
+        pool: List[QItem] = []
+        if number > 0:
+            sampled = await self.question_service.sample_active_questions(
+                subjects=subjects or base.subjects or [],
+                exclude_ids=[q.id for q in base.questions],
+                size=VARIANTS_POOL_SIZE,
+            )
+            pool = [
+                QItem(id=q["id"], question=q["question"])
+                for q in sorted(sampled, key=lambda q: q["id"])
+            ]
+        drawn = min(number, len(pool))
+
+        now = datetime.now(ZoneInfo("Europe/Paris")).replace(microsecond=0)
+        variants = []
+        for index in range(1, count + 1):
+            questions = list(base.questions) + rng.sample(pool, drawn)
+            rng.shuffle(questions)
+            variants.append(
+                Questionnaire(
+                    title=f"{base.title} - variante {index}/{count}",
+                    subjects=base.subjects or [],
+                    uses=base.uses or [],
+                    questions=questions,
+                    remark=base.remark,
+                    status=base.status or QuestionnaireStatus.DRAFT,
+                    created_by=user_id,
+                    created_at=now,
+                    edited_at=None,
+                    variant_of=base.id,
+                )
+            )
+
+        generated_ids = await self.repository.insert_questionnaires(variants)
+        variants = [
+            variant.model_copy(update={"id": generated_id})
+            for variant, generated_id in zip(variants, generated_ids)
+        ]
+
+        # Construction du message
+        if drawn < number:
+            message = f"{count} variante(s) générée(s) ; seulement {drawn} question(s) aléatoire(s) disponible(s) sur {number} demandée(s)"
+        else:
+            message = f"{count} variante(s) générée(s) avec succès"
+
+        return message, seed, variants
@@ -1,10 +1,23 @@
+import hashlib
+import os
+import time
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from models.user import User
-from utils.security import verify_token
+from models.user import User, UserRole
+from utils.cache import TTLCache
+from utils.security import JWT_EXPIRE_MIN, verify_token_async
 
 security = HTTPBearer()
 
+# Utilisateurs des tokens déjà vérifiés, par empreinte SHA-256 du token,
+# conservés jusqu'à l'expiration (exp) du token
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+token_cache = TTLCache(
+    ttl=JWT_EXPIRE_MIN * 60,
+    name="verified_tokens",
+    max_size=TOKEN_CACHE_MAX_SIZE,
+)
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -19,7 +32,12 @@ async def get_current_user(
         HTTPException: Si le token est invalide
     """
     token = credentials.credentials
-    payload = verify_token(token)
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    cached = token_cache.get(digest)
+    if cached is not None:
+        return cached
+
+    payload = await verify_token_async(token)
 
     if payload is None:
         raise HTTPException(
@@ -29,13 +47,34 @@ async def get_current_user(
         )
 
     try:
-        return User(**payload)
+        user = User(**payload)
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Données utilisateur invalides dans le token ({exc})",
         )
 
+    # Mise en cache jusqu'à l'expiration du token (sans exp : TTL par défaut)
+    exp = payload.get("exp")
+    ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+    if ttl is None or ttl > 0:
+        token_cache.set(digest, user, ttl=ttl)
+    return user
+
+
+async def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """
+    Restreint une route aux administrateurs.
+    Raises:
+        HTTPException: 403 si l'utilisateur n'est pas ADMIN
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès réservé aux administrateurs",
+        )
+    return current_user
+
 
 def hide_email(email: str) -> str:
     """
@@ -0,0 +1,123 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Cache mémoire clé/valeur avec durée de vie (TTL) et compteurs de succès/échecs.
+    Thread-safe ; les valeurs expirées sont supprimées à la lecture.
+    Avec max_size, les entrées les moins récemment lues (LRU) sont évincées au-delà de la taille.
+    Chaque invalidation incrémente une génération : set() avec la génération lue avant
+    le calcul de la valeur ignore une valeur calculée avant une invalidation.
+    """
+
+    def __init__(self, ttl: float, name: str = "cache", max_size: Optional[int] = None):
+        self.ttl = ttl
+        self.name = name
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, tuple] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._generation = 0
+        self._stale_sets = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Retourne la valeur associée à la clé, ou None si absente ou expirée.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._hits += 1
+                if self.max_size is not None:
+                    # Entrée relue : replacée en fin d'ordre d'éviction
+                    del self._entries[key]
+                    self._entries[key] = entry
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def generation(self) -> int:
+        """
+        Génération courante, à lire avant de calculer une valeur à mettre en cache.
+        """
+        with self._lock:
+            return self._generation
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        generation: Optional[int] = None,
+    ) -> bool:
+        """
+        Enregistre une valeur pour la durée du TTL (ou pour `ttl` secondes si fourni).
+        Avec `generation`, la valeur n'est pas enregistrée si une invalidation a eu
+        lieu depuis (elle est peut-être déjà périmée).
+        Returns:
+            bool: True si la valeur a été enregistrée
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                self._stale_sets += 1
+                return False
+            self._entries.pop(key, None)
+            self._entries[key] = (
+                time.monotonic() + (self.ttl if ttl is None else ttl),
+                value,
+            )
+            if self.max_size is not None:
+                while len(self._entries) > self.max_size:
+                    del self._entries[next(iter(self._entries))]
+            return True
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Supprime une clé, ou tout le cache si aucune clé n'est donnée.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._invalidations += 1
+            self._generation += 1
+
+    def invalidate_if(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Supprime les clés pour lesquelles predicate(clé) est vrai.
+        Returns:
+            int: Nombre d'entrées supprimées
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            self._invalidations += 1
+            self._generation += 1
+            return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les compteurs du cache.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "name": self.name,
+                "ttl_s": self.ttl,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "stale_sets": self._stale_sets,
+            }
@@ -1,19 +1,27 @@
 import csv
 import io
-import unicodedata
 from collections import Counter
 from difflib import SequenceMatcher
-from typing import Dict, List, Iterator, Tuple
+from typing import Dict, List, Iterator, Optional, Tuple
 from schemas.question import QuestionCreate, QuestionStatus
+from utils.subject_canonicalizer import SubjectCanonicalizer
+from utils.text_normalization import normalize_text
 
 
 class CSVQuestionProcessor:
     """Classe pour traiter les fichiers CSV de questions"""
 
-    def __init__(self, fix_subjects: bool = True, subject_threshold: float = 0.90):
+    def __init__(
+        self,
+        fix_subjects: bool = True,
+        subject_threshold: float = 0.90,
+        canonicalizer: Optional[SubjectCanonicalizer] = None,
+    ):
         self.fix_subjects = fix_subjects
         self.subject_threshold = subject_threshold
         self.subjects_count: Dict[str, int] = {}
+        # Index des sujets connus, éventuellement préchargé avec les sujets en base
+        self.canonicalizer = canonicalizer or SubjectCanonicalizer(subject_threshold)
         self.questions_cache: Dict[str, dict] = {}
         self.stats = {
             "total_rows": 0,
@@ -24,11 +32,7 @@ class CSVQuestionProcessor:
 
     def normalize_text(self, s: str) -> str:
         """Normalise le texte pour la comparaison"""
-        if not s:
-            return ""
-        s = unicodedata.normalize("NFKD", s)
-        s = "".join(ch for ch in s if not unicodedata.combining(ch))
-        return "".join(ch for ch in s.lower() if ch.isalnum())
+        return normalize_text(s)
 
     def letter_similarity(self, a: str, b: str) -> float:
         """Calcule la similarité basée sur les lettres communes"""
@@ -54,27 +58,8 @@ class CSVQuestionProcessor:
         return 0.5 * ls + 0.5 * ss
 
     def canonicalize_subject(self, subject: str) -> Tuple[str, bool]:
-        """Retourne un sujet existant le plus proche si score >= seuil"""
-        if not subject or not self.subjects_count:
-            return subject, False
-
-        if subject in self.subjects_count:
-            return subject, False
-
-        best_subject = None
-        best_score = 0.0
-
-        for s in self.subjects_count.keys():
-            if s == subject:
-                return s, False
-            score = self.similarity(subject, s)
-            if score > best_score:
-                best_score = score
-                best_subject = s
-
-        if best_subject and best_score >= self.subject_threshold:
-            return best_subject, True
-        return subject, False
+        """Retourne un sujet existant le plus proche si score >= seuil (index des sujets connus)"""
+        return self.canonicalizer.canonicalize(subject)
 
     def strip_or_none(self, v: str) -> str:
         """Nettoie les chaînes"""
@@ -198,6 +183,7 @@ class CSVQuestionProcessor:
             subject = canon
             subject_corrected = corrected
             self.subjects_count[canon] = self.subjects_count.get(canon, 0) + 1
+            self.canonicalizer.add(canon)
             if corrected:
                 self.stats["subject_corrections"] += 1
 
@@ -0,0 +1,98 @@
+from itertools import islice
+from typing import Any, List, Optional
+
+from utils.mg_executor import mongo_executor
+
+DEFAULT_BATCH_SIZE = 100
+
+
+class ExecutorCursor:
+    """
+    Curseur pymongo synchrone exposé avec l'interface d'un curseur AsyncMongoClient.
+    Les méthodes de chaînage (sort, limit, skip...) ne font aucune I/O et sont
+    déléguées directement ; la lecture se fait par lots dans le pool partagé.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._batch_size = DEFAULT_BATCH_SIZE
+
+    def sort(self, *args, **kwargs) -> "ExecutorCursor":
+        self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, limit: int) -> "ExecutorCursor":
+        self._cursor.limit(limit)
+        return self
+
+    def skip(self, skip: int) -> "ExecutorCursor":
+        self._cursor.skip(skip)
+        return self
+
+    def hint(self, index) -> "ExecutorCursor":
+        self._cursor.hint(index)
+        return self
+
+    def batch_size(self, batch_size: int) -> "ExecutorCursor":
+        if hasattr(self._cursor, "batch_size"):
+            self._cursor.batch_size(batch_size)
+        self._batch_size = max(1, batch_size)
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        """
+        Lit le curseur en une seule tâche du pool (comme AsyncCursor.to_list).
+        """
+        if length is None:
+            return await mongo_executor.run(lambda: list(self._cursor))
+        return await mongo_executor.run(lambda: list(islice(self._cursor, length)))
+
+    async def close(self):
+        await mongo_executor.run(self._cursor.close)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while True:
+            batch = await mongo_executor.run(
+                lambda: list(islice(self._cursor, self._batch_size))
+            )
+            if not batch:
+                return
+            for doc in batch:
+                yield doc
+
+
+class ExecutorCollection:
+    """
+    Collection pymongo synchrone exposée avec l'interface d'une AsyncCollection.
+    Chaque appel est exécuté dans le pool de threads partagé (MongoExecutor),
+    ce qui permet aux repositories d'être écrits une seule fois en async.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    @property
+    def name(self) -> str:
+        return self._collection.name
+
+    def find(self, *args, **kwargs) -> ExecutorCursor:
+        return ExecutorCursor(self._collection.find(*args, **kwargs))
+
+    async def aggregate(self, pipeline: List[dict], **kwargs) -> ExecutorCursor:
+        cursor = await mongo_executor.run(
+            lambda: self._collection.aggregate(pipeline, **kwargs)
+        )
+        return ExecutorCursor(cursor)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        async def _call(*args, **kwargs):
+            return await mongo_executor.run(lambda: attr(*args, **kwargs))
+
+        return _call
@@ -1,9 +1,12 @@
 import os
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient
 from dotenv import load_dotenv
 from typing import Optional
 import threading
 
+from utils.mg_async import ExecutorCollection
+from utils.mg_indexes import apply_indexes
+
 load_dotenv()
 
 
@@ -12,11 +15,19 @@ class Database:
     Classe pour gérer la connexion à MongoDB avec pymongo (version synchrone).
     Utilise des class methods pour un accès singleton.
     Crée automatiquement la base de données et les collections si elles n'existent pas.
+
+    Deux pilotes sont disponibles pour les repositories (variable MONGO_DRIVER) :
+    - "sync" (défaut) : pymongo synchrone exécuté dans le pool de threads partagé
+    - "async" : AsyncMongoClient, attendu directement dans la boucle asyncio
+    Le client synchrone reste toujours ouvert pour l'initialisation (collections, index).
     """
 
     _lock = threading.RLock()
     _client: Optional[MongoClient] = None
+    _async_client: Optional[AsyncMongoClient] = None
     _db = None
+    _async_db = None
+    _driver = "sync"
     _collection = None
     _mongo_username = None
     _mongo_password = None
@@ -25,6 +36,8 @@ class Database:
     _db_name = None
     _collection_name = None
     _mongodb_uri = None
+    _max_pool_size = 10
+    _min_pool_size = 1
 
     @classmethod
     def _load_config(cls):
@@ -35,6 +48,13 @@ class Database:
         cls._mongo_port = os.getenv("MONGO_PORT", "27018")
         cls._db_name = os.getenv("DB_NAME", "miskatonic")
         cls._collection_name = os.getenv("COLLECTION_NAME", "questions")
+        cls._max_pool_size = int(os.getenv("MONGO_MAX_POOL_SIZE", "10"))
+        cls._min_pool_size = int(os.getenv("MONGO_MIN_POOL_SIZE", "1"))
+        cls._driver = os.getenv("MONGO_DRIVER", "sync").strip().lower()
+        if cls._driver not in ("sync", "async"):
+            raise ValueError(
+                f"MONGO_DRIVER '{cls._driver}' non supporté. Utilisez 'sync' ou 'async'."
+            )
 
         # if cls._mongo_username and cls._mongo_password:
         #    cls._mongodb_uri = f"mongodb://{cls._mongo_username}:{cls._mongo_password}@{cls._mongo_host}:{cls._mongo_port}/"
@@ -46,7 +66,8 @@ class Database:
         """
         Crée les collections nécessaires si elles n'existent pas.
         MongoDB crée automatiquement les bases et collections au premier insert,
-        mais on peut les créer explicitement pour ajouter des validations ou indexes.
+        mais on peut les créer explicitement pour ajouter des validations.
+        Les index sont gérés par le registre de utils/mg_indexes.py.
         """
         try:
             existing_collections = cls._db.list_collection_names()
@@ -55,10 +76,6 @@ class Database:
             if "questions" not in existing_collections:
                 cls._db.create_collection("questions")
                 print("Collection 'questions' créée")
-
-                # Optionnel: Créer des index pour optimiser les requêtes
-                cls._db["questions"].create_index("id")
-                print("Index créé sur 'questions.id'")
             else:
                 print("Collection 'questions' déjà existante")
 
@@ -66,10 +83,6 @@ class Database:
             if "questionnaires" not in existing_collections:
                 cls._db.create_collection("questionnaires")
                 print("Collection 'questionnaires' créée")
-
-                # Optionnel: Créer des index
-                cls._db["questionnaires"].create_index("id")
-                print("Index créé sur 'questionnaires.id'")
             else:
                 print("Collection 'questionnaires' déjà existante")
 
@@ -77,6 +90,22 @@ class Database:
             print(f"Erreur lors de la création des collections: {e}")
             raise
 
+    @classmethod
+    def create_client(cls) -> MongoClient:
+        """
+        Crée un client pymongo synchrone avec la configuration courante.
+        """
+        if cls._mongodb_uri is None:
+            cls._load_config()
+
+        return MongoClient(
+            cls._mongodb_uri,
+            serverSelectionTimeoutMS=5000,
+            connectTimeoutMS=5000,
+            maxPoolSize=cls._max_pool_size,
+            minPoolSize=cls._min_pool_size,
+        )
+
     @classmethod
     def init_db(cls):
         """
@@ -91,13 +120,7 @@ class Database:
             print(f"   URI: {cls._mongodb_uri}")
 
             try:
-                cls._client = MongoClient(
-                    cls._mongodb_uri,
-                    serverSelectionTimeoutMS=5000,
-                    connectTimeoutMS=5000,
-                    maxPoolSize=10,
-                    minPoolSize=1,
-                )
+                cls._client = cls.create_client()
 
                 cls._client.admin.command("ping")
                 print("Connexion MongoDB réussie")
@@ -115,6 +138,9 @@ class Database:
                 # Créer les collections nécessaires
                 cls._create_collections()
 
+                # Appliquer le registre des index (idempotent)
+                apply_indexes(cls._db)
+
                 # Sélectionner la collection par défaut
                 cls._collection = cls._db[cls._collection_name]
 
@@ -125,6 +151,45 @@ class Database:
                 print(f"Erreur connexion MongoDB: {e}")
                 raise
 
+    @classmethod
+    async def init_async_db(cls):
+        """
+        Ouvre le client AsyncMongoClient si le pilote "async" est configuré.
+        Doit être appelé après init_db (qui crée collections et index).
+        """
+        if cls._mongodb_uri is None:
+            cls._load_config()
+        if cls._driver != "async" or cls._async_client is not None:
+            return
+
+        try:
+            client = AsyncMongoClient(
+                cls._mongodb_uri,
+                serverSelectionTimeoutMS=5000,
+                connectTimeoutMS=5000,
+                maxPoolSize=cls._max_pool_size,
+                minPoolSize=cls._min_pool_size,
+            )
+            await client.admin.command("ping")
+            cls._async_client = client
+            cls._async_db = client[cls._db_name]
+            print("Connexion MongoDB asynchrone réussie")
+        except Exception as e:
+            print(f"Erreur connexion MongoDB asynchrone: {e}")
+            raise
+
+    @classmethod
+    async def close_async_db(cls):
+        """
+        Ferme le client AsyncMongoClient s'il est ouvert.
+        """
+        client = cls._async_client
+        cls._async_client = None
+        cls._async_db = None
+        if client is not None:
+            await client.close()
+            print("Connexion MongoDB asynchrone fermée")
+
     @classmethod
     def close_db(cls):
         """
@@ -174,6 +239,56 @@ class Database:
             return cls._db[collection_name]
         return cls._collection
 
+    @classmethod
+    def get_async_collection(cls, collection_name: str = None):
+        """
+        Retourne une collection à l'interface asynchrone, selon le pilote configuré :
+        AsyncCollection native, ou collection synchrone exécutée dans le pool partagé.
+        """
+        if cls._driver == "async":
+            if cls._async_db is None:
+                raise Exception("Base de données asynchrone non initialisée")
+            return cls._async_db[collection_name or cls._collection_name]
+
+        return ExecutorCollection(cls.get_collection(collection_name))
+
+    @classmethod
+    def get_driver(cls) -> str:
+        """
+        Retourne le pilote utilisé par les repositories ("sync" ou "async").
+        """
+        if cls._mongodb_uri is None:
+            cls._load_config()
+        return cls._driver
+
+    @classmethod
+    def get_db_name(cls) -> str:
+        """
+        Retourne le nom de la base de données configurée.
+        """
+        if cls._mongodb_uri is None:
+            cls._load_config()
+        return cls._db_name
+
+    @classmethod
+    def get_collection_name(cls) -> str:
+        """
+        Retourne le nom de la collection par défaut (questions, COLLECTION_NAME).
+        """
+        if cls._mongodb_uri is None:
+            cls._load_config()
+        return cls._collection_name
+
+    @classmethod
+    def get_max_pool_size(cls) -> int:
+        """
+        Retourne la taille maximale du pool de connexions MongoDB.
+        Sert à dimensionner l'exécuteur partagé des repositories.
+        """
+        if cls._mongodb_uri is None:
+            cls._load_config()
+        return cls._max_pool_size
+
     @classmethod
     def get_collection_stats(cls):
         """
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class MongoExecutor:
+    """
+    Pool de threads partagé par tous les repositories pour exécuter les appels
+    pymongo (synchrones) depuis FastAPI (asynchrone).
+    Utilise des class methods pour un accès singleton, comme Database.
+    Le pool est créé et détruit par le cycle de vie de QuizAPI.
+    """
+
+    _lock = threading.Lock()
+    _executor: Optional[ThreadPoolExecutor] = None
+    _max_workers = 0
+
+    # Métriques
+    _queued = 0
+    _running = 0
+    _submitted = 0
+    _completed = 0
+    _failed = 0
+    _total_wait = 0.0
+    _max_wait = 0.0
+
+    @classmethod
+    def init_executor(cls, max_workers: int):
+        """
+        Crée le pool de threads partagé.
+        Args:
+            max_workers: Nombre de threads (aligné sur le maxPoolSize MongoDB)
+        """
+        with cls._lock:
+            if cls._executor is not None:
+                return
+
+            cls._max_workers = max(1, max_workers)
+            cls._executor = ThreadPoolExecutor(
+                max_workers=cls._max_workers, thread_name_prefix="mongo"
+            )
+            print(f"Exécuteur MongoDB initialisé ({cls._max_workers} threads)")
+
+    @classmethod
+    def shutdown_executor(cls):
+        """
+        Arrête le pool de threads en attendant la fin des tâches en cours.
+        """
+        with cls._lock:
+            executor = cls._executor
+            cls._executor = None
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+            print("Exécuteur MongoDB arrêté")
+
+    @classmethod
+    async def run(cls, sync_func: Callable[[], T]) -> T:
+        """
+        Exécute une fonction synchrone dans le pool partagé.
+        Args:
+            sync_func: Fonction sans argument à exécuter
+        Returns:
+            Le résultat de sync_func
+        """
+        executor = cls._executor
+        if executor is None:
+            raise Exception("Exécuteur MongoDB non initialisé")
+
+        submitted_at = time.perf_counter()
+        with cls._lock:
+            cls._queued += 1
+            cls._submitted += 1
+
+        def _task():
+            waited = time.perf_counter() - submitted_at
+            with cls._lock:
+                cls._queued -= 1
+                cls._running += 1
+                cls._total_wait += waited
+                cls._max_wait = max(cls._max_wait, waited)
+            try:
+                return sync_func()
+            except Exception:
+                with cls._lock:
+                    cls._failed += 1
+                raise
+            finally:
+                with cls._lock:
+                    cls._running -= 1
+                    cls._completed += 1
+
+        future = executor.submit(_task)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Tâche annulée avant d'avoir démarré : elle ne sortira jamais de la file
+            if future.cancel():
+                with cls._lock:
+                    cls._queued -= 1
+            raise
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """
+        Retourne les métriques du pool (profondeur de file, temps d'attente...).
+        """
+        with cls._lock:
+            started = cls._completed + cls._running
+            return {
+                "initialized": cls._executor is not None,
+                "max_workers": cls._max_workers,
+                "queue_depth": cls._queued,
+                "running": cls._running,
+                "submitted": cls._submitted,
+                "completed": cls._completed,
+                "failed": cls._failed,
+                "avg_wait_ms": (
+                    round(cls._total_wait / started * 1000, 3) if started else 0.0
+                ),
+                "max_wait_ms": round(cls._max_wait * 1000, 3),
+            }
+
+
+# Instance globale
+mongo_executor = MongoExecutor
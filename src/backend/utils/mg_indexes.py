@@ -0,0 +1,184 @@
+"""
+Registre déclaratif des index MongoDB.
+
+Les index sont appliqués de façon idempotente au démarrage (Database.init_db).
+Rapport des index manquants, non déclarés ou inutilisés ($indexStats) :
+
+    python -m utils.mg_indexes report
+    python -m utils.mg_indexes apply
+"""
+
+import argparse
+import sys
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, TEXT, IndexModel
+from pymongo.errors import PyMongoError
+
+# Index déclarés par collection logique (le nom est explicite pour le rapport) ;
+# collection_names() donne le nom réel de chaque collection
+INDEXES: Dict[str, List[IndexModel]] = {
+    "questions": [
+        IndexModel([("subject", ASCENDING)], name="subject_1"),
+        IndexModel([("use", ASCENDING)], name="use_1"),
+        IndexModel(
+            [("status", ASCENDING), ("subject", ASCENDING)], name="status_1_subject_1"
+        ),
+        IndexModel([("created_by", ASCENDING)], name="created_by_1"),
+        IndexModel([("subject_norm", ASCENDING)], name="subject_norm_1"),
+        IndexModel([("subject_ngrams", ASCENDING)], name="subject_ngrams_1"),
+        # Recherche plein texte (racinisation française, pertinence pondérée)
+        IndexModel(
+            [("question", TEXT), ("responses", TEXT), ("remark", TEXT)],
+            name="question_text",
+            default_language="french",
+            weights={"question": 10, "responses": 3, "remark": 1},
+        ),
+    ],
+    "questionnaires": [
+        IndexModel([("subjects", ASCENDING)], name="subjects_1"),
+        IndexModel([("uses", ASCENDING)], name="uses_1"),
+        IndexModel(
+            [("status", ASCENDING), ("subjects", ASCENDING)],
+            name="status_1_subjects_1",
+        ),
+        IndexModel([("created_by", ASCENDING)], name="created_by_1"),
+        IndexModel([("questions.id", ASCENDING)], name="questions.id_1"),
+    ],
+    "facets": [
+        IndexModel([("kind", ASCENDING), ("value", ASCENDING)], name="kind_1_value_1"),
+        IndexModel(
+            [("kind", ASCENDING), ("value_norm", ASCENDING)], name="kind_1_value_norm_1"
+        ),
+    ],
+}
+
+# Index créés par d'anciennes versions et supprimés au démarrage
+OBSOLETE_INDEXES: Dict[str, List[str]] = {
+    "questions": ["id_1"],
+    "questionnaires": ["id_1"],
+}
+
+
+def collection_names() -> Dict[str, str]:
+    """
+    Nom réel de chaque collection logique, tel qu'utilisé par les repositories.
+    """
+    # Import différé : les repositories importent utils.mg_database, qui importe ce module
+    from repositories.question_repository import FACETS_COLLECTION
+    from repositories.questionnaire_repository import COLLECTION_NAME
+    from utils.mg_database import Database
+
+    return {
+        "questions": Database.get_collection_name(),
+        "questionnaires": COLLECTION_NAME,
+        "facets": FACETS_COLLECTION,
+    }
+
+
+def apply_indexes(db) -> List[str]:
+    """
+    Crée les index déclarés et supprime les index obsolètes (idempotent).
+    Chaque index est créé séparément : un conflit (même clé, options différentes)
+    n'empêche pas la création des autres.
+    Args:
+        db: Base pymongo synchrone
+    Returns:
+        list: Index en échec ("collection.nom"), vide si tout est en place
+    """
+    names = collection_names()
+    for logical_name, obsolete in OBSOLETE_INDEXES.items():
+        collection = db[names[logical_name]]
+        existing = collection.index_information()
+        for name in obsolete:
+            if name in existing:
+                collection.drop_index(name)
+                print(f"Index obsolète supprimé: {collection.name}.{name}")
+
+    failed = []
+    for logical_name, models in INDEXES.items():
+        collection = db[names[logical_name]]
+        created = []
+        for model in models:
+            index_name = model.document["name"]
+            try:
+                collection.create_indexes([model])
+                created.append(index_name)
+            except PyMongoError as e:
+                # Ex. index existant avec la même clé mais des options différentes
+                failed.append(f"{collection.name}.{index_name}")
+                print(f"Erreur lors de la création de l'index {failed[-1]}: {e}")
+        print(f"Index vérifiés sur '{collection.name}': {', '.join(created) or '-'}")
+
+    if failed:
+        print(f"Index non créés ({len(failed)}): {', '.join(failed)}")
+    return failed
+
+
+def index_report(db) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare les index déclarés à ceux présents en base et à leur usage ($indexStats).
+    Returns:
+        dict: Par collection, les index manquants, non déclarés et inutilisés
+    """
+    report: Dict[str, Dict[str, Any]] = {}
+    names = collection_names()
+    for logical_name, models in INDEXES.items():
+        collection_name = names[logical_name]
+        collection = db[collection_name]
+        declared = {model.document["name"] for model in models}
+        existing = set(collection.index_information()) - {"_id_"}
+
+        usage = {}
+        for stat in collection.aggregate([{"$indexStats": {}}]):
+            usage[stat["name"]] = {
+                "ops": stat.get("accesses", {}).get("ops", 0),
+                "since": stat.get("accesses", {}).get("since"),
+            }
+
+        report[collection_name] = {
+            "missing": sorted(declared - existing),
+            "undeclared": sorted(existing - declared),
+            "unused": sorted(
+                name for name in existing if usage.get(name, {}).get("ops", 0) == 0
+            ),
+            "usage": {name: usage[name] for name in sorted(usage)},
+        }
+    return report
+
+
+def main(argv: List[str] = None) -> int:
+    from utils.mg_database import Database
+
+    parser = argparse.ArgumentParser(description="Gestion des index MongoDB")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["report", "apply"],
+        default="report",
+        help="report: index manquants/inutilisés ; apply: crée les index déclarés",
+    )
+    args = parser.parse_args(argv)
+
+    client = Database.create_client()
+    try:
+        db = client[Database.get_db_name()]
+        if args.command == "apply":
+            return 1 if apply_indexes(db) else 0
+
+        problems = 0
+        for collection_name, info in index_report(db).items():
+            print(f"[{collection_name}]")
+            print(f"  manquants     : {', '.join(info['missing']) or '-'}")
+            print(f"  non déclarés  : {', '.join(info['undeclared']) or '-'}")
+            print(f"  inutilisés    : {', '.join(info['unused']) or '-'}")
+            for name, stat in info["usage"].items():
+                print(f"    {name}: {stat['ops']} accès depuis {stat['since']}")
+            problems += len(info["missing"])
+        return 1 if problems else 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
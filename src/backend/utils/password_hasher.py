@@ -0,0 +1,154 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import bcrypt
+
+T = TypeVar("T")
+
+# Coût bcrypt des nouveaux hachages (les anciens sont rehachés à la connexion)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads dédiés à bcrypt (qui libère le GIL) et nombre max de calculs en attente
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "32"))
+
+
+class HasherBusyError(Exception):
+    """
+    Levée quand trop de calculs bcrypt sont déjà en cours ou en attente.
+    """
+
+
+class PasswordHasher:
+    """
+    Pool de threads dédié à bcrypt, pour ne pas bloquer la boucle asyncio.
+    Au-delà de BCRYPT_MAX_PENDING calculs en cours ou en attente, les demandes
+    sont refusées immédiatement (HasherBusyError) au lieu d'allonger la file.
+    Utilise des class methods pour un accès singleton, comme MongoExecutor.
+    """
+
+    _lock = threading.Lock()
+    _executor: Optional[ThreadPoolExecutor] = None
+
+    # Métriques
+    _pending = 0
+    _completed = 0
+    _rejected = 0
+    _rehashed = 0
+    _total_time = 0.0
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        """
+        Retourne le pool, créé au premier calcul.
+        """
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=max(1, BCRYPT_WORKERS), thread_name_prefix="bcrypt"
+                )
+                print(f"Pool bcrypt initialisé ({BCRYPT_WORKERS} threads)")
+            return cls._executor
+
+    @classmethod
+    def shutdown(cls):
+        """
+        Arrête le pool en attendant la fin des calculs en cours.
+        """
+        with cls._lock:
+            executor = cls._executor
+            cls._executor = None
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+            print("Pool bcrypt arrêté")
+
+    @classmethod
+    async def _run(cls, func: Callable[[], T]) -> T:
+        """
+        Exécute un calcul bcrypt dans le pool, ou le refuse si la file est pleine.
+        """
+        with cls._lock:
+            if cls._pending >= BCRYPT_MAX_PENDING:
+                cls._rejected += 1
+                raise HasherBusyError(
+                    "Trop de vérifications de mot de passe en cours, réessayez"
+                )
+            cls._pending += 1
+
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(cls._get_executor(), func)
+        finally:
+            with cls._lock:
+                cls._pending -= 1
+                cls._completed += 1
+                cls._total_time += time.perf_counter() - started
+
+    @classmethod
+    async def hash(cls, password: str) -> str:
+        """
+        Hache un mot de passe avec le coût BCRYPT_ROUNDS.
+        """
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+        hashed = await cls._run(lambda: bcrypt.hashpw(password.encode("utf-8"), salt))
+        return hashed.decode("utf-8")
+
+    @classmethod
+    async def verify(cls, password: str, hashed: str) -> bool:
+        """
+        Vérifie un mot de passe contre son hachage bcrypt.
+        """
+        stored = hashed.encode("utf-8") if isinstance(hashed, str) else hashed
+        return await cls._run(lambda: bcrypt.checkpw(password.encode("utf-8"), stored))
+
+    @staticmethod
+    def needs_rehash(hashed: str) -> bool:
+        """
+        Indique si le hachage a été produit avec un autre coût que BCRYPT_ROUNDS.
+        Format bcrypt : $2b$<coût>$<sel+hachage>
+        """
+        if isinstance(hashed, bytes):
+            hashed = hashed.decode("utf-8")
+        parts = hashed.split("$")
+        try:
+            return int(parts[2]) != BCRYPT_ROUNDS
+        except (IndexError, ValueError):
+            return False
+
+    @classmethod
+    def record_rehash(cls):
+        """
+        Compte un hachage mis à jour lors d'une connexion.
+        """
+        with cls._lock:
+            cls._rehashed += 1
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """
+        Retourne les métriques du pool bcrypt.
+        """
+        with cls._lock:
+            return {
+                "rounds": BCRYPT_ROUNDS,
+                "workers": BCRYPT_WORKERS,
+                "max_pending": BCRYPT_MAX_PENDING,
+                "pending": cls._pending,
+                "completed": cls._completed,
+                "rejected": cls._rejected,
+                "rehashed": cls._rehashed,
+                "avg_ms": (
+                    round(cls._total_time / cls._completed * 1000, 3)
+                    if cls._completed
+                    else 0.0
+                ),
+            }
+
+
+# Instance globale
+password_hasher = PasswordHasher
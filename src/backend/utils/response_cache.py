@@ -0,0 +1,126 @@
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+from fastapi import Request, Response, status
+
+from utils.cache import TTLCache
+
+
+class CachedResponse(NamedTuple):
+    """
+    Réponse JSON sérialisée et son ETag.
+    """
+
+    etag: str
+    body: bytes
+
+
+class ResponseCache:
+    """
+    Cache des réponses JSON déjà sérialisées, avec ETag et réponses 304.
+    Les clés sont des tuples dont le premier élément est l'identifiant du document
+    chargé (forme canonique), ce qui permet d'invalider toutes les variantes (format,
+    rôle) d'un document.
+    Chaque invalidation incrémente une génération : une réponse construite à partir
+    d'une lecture commencée avant une invalidation n'est pas mise en cache.
+    Le cache est propre au processus : le TTL borne la durée de validité d'une entrée
+    lorsque l'écriture a eu lieu dans un autre worker.
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int):
+        self._cache = TTLCache(ttl=ttl, name=name, max_size=max_size)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._stale_sets = 0
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        """
+        ETag fort calculé sur le contenu sérialisé.
+        """
+        return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """
+        Retourne la réponse en cache, ou None.
+        """
+        return self._cache.get(key)
+
+    def generation(self) -> int:
+        """
+        Génération courante, à lire avant de charger le document.
+        """
+        with self._lock:
+            return self._generation
+
+    def set(self, key: Hashable, body: bytes, generation: int) -> CachedResponse:
+        """
+        Met en cache un corps JSON sérialisé et retourne l'entrée (avec son ETag).
+        L'entrée n'est pas conservée si une invalidation a eu lieu depuis `generation`
+        (le document lu est peut-être déjà périmé) : elle sert alors à cette seule réponse.
+        """
+        cached = CachedResponse(etag=self.make_etag(body), body=body)
+        with self._lock:
+            if generation == self._generation:
+                self._cache.set(key, cached)
+            else:
+                self._stale_sets += 1
+        return cached
+
+    def invalidate_document(self, document_id: str) -> None:
+        """
+        Supprime toutes les entrées d'un document (identifiant canonique).
+        """
+        self.invalidate_if(lambda key: key[0] == document_id)
+
+    def invalidate_if(self, predicate: Callable[[Hashable], bool]) -> None:
+        """
+        Supprime les entrées dont la clé vérifie le prédicat.
+        """
+        with self._lock:
+            self._generation += 1
+            self._cache.invalidate_if(predicate)
+
+    def invalidate(self) -> None:
+        """
+        Vide le cache.
+        """
+        with self._lock:
+            self._generation += 1
+            self._cache.invalidate()
+
+    @staticmethod
+    def respond(cached: CachedResponse, request: Request) -> Response:
+        """
+        Construit la réponse HTTP : 304 si le client possède déjà cette version
+        (If-None-Match), sinon le corps mis en cache.
+        """
+        headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match", "")
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if cached.etag in candidates or "*" in candidates:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(
+            content=cached.body, media_type="application/json", headers=headers
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les compteurs du cache.
+        """
+        stats = self._cache.get_stats()
+        with self._lock:
+            stats["generation"] = self._generation
+            stats["stale_sets"] = self._stale_sets
+        return stats
+
+
+_ttl = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+_max_size = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "5000"))
+
+# Réponses de GET /api/question/{id}, clé (id, réponses correctes visibles)
+question_responses = ResponseCache("question_responses", _ttl, _max_size)
+# Réponses de GET /api/questionnaire/{id}/{format}, clé (id, format)
+questionnaire_responses = ResponseCache("questionnaire_responses", _ttl, _max_size)
@@ -1,8 +1,24 @@
+"""
+Sous-système unique des tokens JWT : signature, vérification et trousseau de clés.
+
+Algorithmes : HS256 (secret partagé), RS256 ou EdDSA (clé privée PEM).
+Chaque token porte le `kid` de la clé qui l'a signé ; les clés précédentes restent
+acceptées en vérification pour la rotation. Avec une clé asymétrique, les autres
+instances de l'API vérifient les tokens localement avec les seules clés publiques
+(fichiers PEM ou JWKS publié par `/.well-known/jwks.json`), sans partager de secret.
+"""
+
+import hashlib
+import os
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, NamedTuple, Optional
 from dotenv import load_dotenv
-import os
 import jwt
+from fastapi.concurrency import run_in_threadpool
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed448, ed25519, rsa
 
 load_dotenv()
 
@@ -10,6 +26,253 @@ load_dotenv()
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-only-unsafe-secret")
 JWT_ALG = os.getenv("JWT_ALG", "HS256")
 JWT_EXPIRE_MIN = int(os.getenv("JWT_EXPIRE_MIN", "60"))
+# Clé de signature active (optionnelle : kid dérivé de la clé sinon)
+JWT_KID = os.getenv("JWT_KID", "")
+# Clé privée PEM (RS256 / EdDSA)
+JWT_PRIVATE_KEY_FILE = os.getenv("JWT_PRIVATE_KEY_FILE", "")
+# Anciens secrets HS256 encore acceptés : "kid1:secret1,kid2:secret2"
+JWT_PREVIOUS_SECRETS = os.getenv("JWT_PREVIOUS_SECRETS", "")
+# Clés publiques acceptées en vérification : <kid>.pem dans ce répertoire
+JWT_PUBLIC_KEYS_DIR = os.getenv("JWT_PUBLIC_KEYS_DIR", "")
+# JWKS distant (instances sans clé privée)
+JWT_JWKS_URL = os.getenv("JWT_JWKS_URL", "")
+# Délai minimal (s) entre deux recherches déclenchées par un kid inconnu (tous kids
+# confondus), et avant de rechercher de nouveau un même kid resté introuvable
+JWT_KEYS_RELOAD_MIN = 30.0
+# Nombre maximal de kids introuvables mémorisés
+JWT_MISSING_KIDS_MAX = 1024
+
+SYMMETRIC_ALGS = ("HS256",)
+ASYMMETRIC_ALGS = ("RS256", "EdDSA")
+
+
+class TokenKey(NamedTuple):
+    """
+    Clé du trousseau : `signing` est None pour une clé de vérification seule.
+    """
+
+    kid: str
+    alg: str
+    verifying: Any
+    signing: Any = None
+
+
+def _public_kid(public_key) -> str:
+    """
+    Identifiant stable d'une clé publique (empreinte SHA-256 de sa forme DER).
+    """
+    der = public_key.public_bytes(
+        serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return hashlib.sha256(der).hexdigest()[:16]
+
+
+def _public_alg(public_key) -> str:
+    """
+    Algorithme JWT correspondant au type de clé publique.
+    Raises:
+        ValueError: Si le type de clé n'est pas supporté (RSA, Ed25519, Ed448)
+    """
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return "RS256"
+    if isinstance(public_key, (ed25519.Ed25519PublicKey, ed448.Ed448PublicKey)):
+        return "EdDSA"
+    raise ValueError(
+        f"Type de clé publique JWT non supporté: {type(public_key).__name__}"
+    )
+
+
+class TokenKeyring:
+    """
+    Trousseau des clés JWT : une clé active pour signer, plusieurs clés (par kid)
+    pour vérifier. Les clés publiques chargées sont gardées en mémoire ; un kid
+    inconnu déclenche un rechargement puis une recherche dans le JWKS distant, au
+    plus une fois par JWT_KEYS_RELOAD_MIN tous kids confondus, et un kid resté
+    introuvable n'est recherché de nouveau qu'après ce même délai.
+    Ces recherches sont bloquantes (fichiers, HTTP) : voir verify_token_async.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: Dict[str, TokenKey] = {}
+        self._active: Optional[TokenKey] = None
+        self._loaded_at = 0.0
+        # Dernier échec du chargement initial, dernière recherche due à un kid inconnu
+        self._load_failed_at: Optional[float] = None
+        self._refreshed_at: Optional[float] = None
+        # Clés obtenues du JWKS distant, conservées lors des rechargements
+        self._remote_keys: Dict[str, TokenKey] = {}
+        # kid introuvable -> instant de la dernière recherche
+        self._missing: Dict[str, float] = {}
+        self._jwks_client = (
+            jwt.PyJWKClient(JWT_JWKS_URL, cache_keys=True) if JWT_JWKS_URL else None
+        )
+
+    def _load(self) -> None:
+        """
+        Construit le trousseau depuis la configuration.
+        """
+        keys: Dict[str, TokenKey] = {}
+        active: Optional[TokenKey] = None
+
+        if JWT_ALG in SYMMETRIC_ALGS:
+            active = TokenKey(JWT_KID or "default", JWT_ALG, JWT_SECRET, JWT_SECRET)
+            for item in filter(None, JWT_PREVIOUS_SECRETS.split(",")):
+                kid, _, secret = item.partition(":")
+                keys[kid.strip()] = TokenKey(kid.strip(), JWT_ALG, secret, None)
+        elif JWT_ALG in ASYMMETRIC_ALGS:
+            if JWT_PRIVATE_KEY_FILE:
+                with open(JWT_PRIVATE_KEY_FILE, "rb") as f:
+                    private_key = serialization.load_pem_private_key(
+                        f.read(), password=None
+                    )
+                public_key = private_key.public_key()
+                active = TokenKey(
+                    JWT_KID or _public_kid(public_key), JWT_ALG, public_key, private_key
+                )
+        else:
+            raise ValueError(f"Algorithme JWT non supporté: {JWT_ALG}")
+
+        if JWT_PUBLIC_KEYS_DIR and os.path.isdir(JWT_PUBLIC_KEYS_DIR):
+            for name in sorted(os.listdir(JWT_PUBLIC_KEYS_DIR)):
+                if not name.endswith(".pem"):
+                    continue
+                with open(os.path.join(JWT_PUBLIC_KEYS_DIR, name), "rb") as f:
+                    public_key = serialization.load_pem_public_key(f.read())
+                kid = name[: -len(".pem")]
+                keys[kid] = TokenKey(kid, _public_alg(public_key), public_key, None)
+
+        if active is not None:
+            keys[active.kid] = active
+        # Les clés de la configuration locale priment sur celles du JWKS
+        self._keys = {**self._remote_keys, **keys}
+        self._active = active
+        self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded_at:
+            with self._lock:
+                if not self._loaded_at:
+                    if not self.lookup_allowed(None):
+                        raise RuntimeError(
+                            "Trousseau JWT indisponible (échec du chargement)"
+                        )
+                    try:
+                        self._load()
+                    except Exception:
+                        self._load_failed_at = time.monotonic()
+                        raise
+
+    def lookup_allowed(self, kid: Optional[str], now: Optional[float] = None) -> bool:
+        """
+        Indique si un chargement (trousseau pas encore chargé) ou une recherche de ce
+        kid inconnu est permis maintenant, sans rien charger.
+        """
+        now = time.monotonic() if now is None else now
+        if not self._loaded_at:
+            failed_at = self._load_failed_at
+            return failed_at is None or now - failed_at > JWT_KEYS_RELOAD_MIN
+        if not kid:
+            return False
+        last = self._missing.get(kid)
+        if last is not None and now - last <= JWT_KEYS_RELOAD_MIN:
+            return False
+        refreshed_at = self._refreshed_at
+        return refreshed_at is None or now - refreshed_at > JWT_KEYS_RELOAD_MIN
+
+    def active_key(self) -> TokenKey:
+        """
+        Retourne la clé de signature active.
+        Raises:
+            RuntimeError: Si cette instance n'a pas de clé de signature
+        """
+        self._ensure_loaded()
+        if self._active is None or self._active.signing is None:
+            raise RuntimeError("Aucune clé de signature JWT configurée")
+        return self._active
+
+    def find(self, kid: Optional[str]) -> Optional[TokenKey]:
+        """
+        Retourne la clé de vérification d'un kid (clé active si le token n'en a pas).
+        Un kid inconnu déclenche un rechargement puis une recherche dans le JWKS
+        distant s'il est configuré, si lookup_allowed le permet : au plus une
+        recherche par JWT_KEYS_RELOAD_MIN, et pas pour un kid récemment introuvable.
+        """
+        self._ensure_loaded()
+        if not kid:
+            return self._active
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        now = time.monotonic()
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+            if not self.lookup_allowed(kid, now):
+                return None
+            # Créneau réservé avant le chargement : un échec ne le libère pas
+            self._refreshed_at = now
+            self._load()
+            key = self._keys.get(kid)
+
+        # Requête HTTP hors verrou : les autres kids restent vérifiables pendant l'appel
+        if key is None and self._jwks_client is not None:
+            try:
+                jwk = self._jwks_client.get_signing_key(kid)
+                key = TokenKey(kid, jwk.algorithm_name, jwk.key, None)
+            except jwt.PyJWKClientError as e:
+                print(f"Clé JWT '{kid}' introuvable dans le JWKS: {e}")
+
+        with self._lock:
+            if key is None:
+                # Le plus ancien kid introuvable est oublié en premier
+                if len(self._missing) >= JWT_MISSING_KIDS_MAX:
+                    self._missing.pop(next(iter(self._missing)))
+                self._missing.pop(kid, None)
+                self._missing[kid] = now
+                return None
+            self._missing.pop(kid, None)
+            if kid not in self._keys:
+                self._remote_keys[kid] = key
+                self._keys = {**self._keys, kid: key}
+            return self._keys[kid]
+
+    def peek(self, kid: Optional[str]) -> Optional[TokenKey]:
+        """
+        Clé déjà en mémoire pour ce kid, sans chargement ni recherche (None sinon).
+        """
+        if not self._loaded_at:
+            return None
+        return self._keys.get(kid) if kid else self._active
+
+    def public_jwks(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Clés publiques du trousseau au format JWKS (les secrets HS256 sont exclus).
+        """
+        self._ensure_loaded()
+        keys = []
+        for key in self._keys.values():
+            # Seules les clés de cette instance sont publiées, pas celles du JWKS distant
+            if key.alg not in ASYMMETRIC_ALGS or self._remote_keys.get(key.kid) is key:
+                continue
+            algorithm = jwt.get_algorithm_by_name(key.alg)
+            jwk = algorithm.to_jwk(key.verifying, as_dict=True)
+            jwk.update({"kid": key.kid, "alg": key.alg, "use": "sig"})
+            keys.append(jwk)
+        return {"keys": keys}
+
+    def reload(self) -> None:
+        """
+        Recharge le trousseau (rotation des clés sans redémarrage).
+        """
+        with self._lock:
+            self._load()
+
+
+# Trousseau global
+keyring = TokenKeyring()
 
 
 def create_access_token(
@@ -18,7 +281,7 @@ def create_access_token(
     expires_delta: Optional[timedelta] = None,
 ) -> str:
     """
-    Crée un JWT signé HS256.
+    Crée un JWT signé avec la clé active du trousseau (kid dans l'en-tête).
 
     Args:
         subject: une chaîne unique (ex: user_id ou email)
@@ -40,12 +303,43 @@ def create_access_token(
         {"sub": subject, "iat": int(now.timestamp()), "exp": int(exp.timestamp())}
     )
 
-    return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALG)
+    key = keyring.active_key()
+    return jwt.encode(
+        to_encode, key.signing, algorithm=key.alg, headers={"kid": key.kid}
+    )
 
 
 def verify_token(token: str) -> Optional[Dict[str, Any]]:
     """
-    Vérifie et décode un JWT.
+    Vérifie et décode un JWT avec la clé désignée par son kid.
+    Seul l'algorithme de cette clé est accepté.
+
+    Args:
+        token: Token JWT à vérifier
+
+    Returns:
+        Dict contenant les claims du token ou None si invalide
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+        key = keyring.find(header.get("kid"))
+        if key is None:
+            return None
+        return jwt.decode(token, key.verifying, algorithms=[key.alg])
+    except jwt.InvalidTokenError:
+        return None
+    except Exception as e:
+        # Trousseau illisible (PEM invalide, type de clé non supporté...) : token refusé
+        print(f"❌ Erreur du trousseau JWT: {e}")
+        return None
+
+
+async def verify_token_async(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Variante de verify_token pour la boucle asyncio : si la clé du token n'est pas
+    encore en mémoire et qu'une recherche est permise (lookup_allowed), la recherche
+    (fichiers, JWKS distant) et la vérification s'exécutent dans un thread de
+    travail ; sinon le token est refusé sans quitter la boucle.
 
     Args:
         token: Token JWT à vérifier
@@ -54,9 +348,12 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
         Dict contenant les claims du token ou None si invalide
     """
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
-        return payload
-    except jwt.ExpiredSignatureError:
+        header = jwt.get_unverified_header(token)
+    except jwt.InvalidTokenError:
         return None
-    except jwt.JWTError:
+    kid = header.get("kid")
+    if keyring.peek(kid) is not None:
+        return verify_token(token)
+    if not keyring.lookup_allowed(kid):
         return None
+    return await run_in_threadpool(verify_token, token)
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Regroupe les lectures identiques concurrentes : pour une même clé, un seul appel
+    est en cours à la fois et tous les appelants concurrents en partagent le résultat
+    (ou l'exception). Propre à la boucle asyncio du processus.
+    """
+
+    def __init__(self, name: str, max_keys: int = 1000):
+        self.name = name
+        self.max_keys = max_keys
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self._key_stats: Dict[Hashable, Dict[str, int]] = {}
+        self._executions = 0
+        self._shared = 0
+
+    def _stats_for(self, key: Hashable) -> Dict[str, int]:
+        """
+        Compteurs d'une clé ; les clés les plus anciennes sont oubliées au-delà de max_keys.
+        """
+        stats = self._key_stats.pop(key, None)
+        if stats is None:
+            stats = {"executions": 0, "shared": 0, "max_waiters": 0}
+        self._key_stats[key] = stats
+        while len(self._key_stats) > self.max_keys:
+            del self._key_stats[next(iter(self._key_stats))]
+        return stats
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Exécute func() pour la clé, ou attend l'appel déjà en cours pour cette clé.
+        L'annulation d'un appelant n'interrompt pas l'appel partagé.
+        """
+        stats = self._stats_for(key)
+        future = self._inflight.get(key)
+
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._inflight[key] = future
+            self._waiters[key] = 0
+            future.add_done_callback(lambda done: self._forget(key, done))
+            self._executions += 1
+            stats["executions"] += 1
+        else:
+            self._shared += 1
+            stats["shared"] += 1
+
+        # Appelants en attente simultanée de cet appel (décompté à leur sortie)
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        stats["max_waiters"] = max(stats["max_waiters"], self._waiters[key])
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self._inflight.get(key) is future:
+                self._waiters[key] -= 1
+
+    def _forget(self, key: Hashable, done: asyncio.Future) -> None:
+        """
+        Retire l'appel terminé ; les appels suivants relanceront une lecture.
+        """
+        if self._inflight.get(key) is done:
+            del self._inflight[key]
+            self._waiters.pop(key, None)
+        if not done.cancelled():
+            done.exception()  # marque l'exception comme lue si tous les appelants sont partis
+
+    def get_stats(self, top: int = 10) -> Dict[str, Any]:
+        """
+        Retourne les compteurs globaux et ceux des clés les plus regroupées.
+        """
+        calls = self._executions + self._shared
+        hottest = sorted(
+            self._key_stats.items(), key=lambda item: item[1]["shared"], reverse=True
+        )[:top]
+        return {
+            "name": self.name,
+            "in_flight": len(self._inflight),
+            "executions": self._executions,
+            "shared": self._shared,
+            "shared_rate": round(self._shared / calls, 4) if calls else 0.0,
+            "keys": {str(key): dict(stats) for key, stats in hottest},
+        }
@@ -1,10 +1,168 @@
-import sqlite3
 import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+
+# Taille du pool de connexions SQLite et attente maximale (s) d'une connexion libre
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+SQLITE_POOL_TIMEOUT = float(os.getenv("SQLITE_POOL_TIMEOUT", "5"))
+# Nombre de requêtes préparées gardées en cache par connexion
+SQLITE_CACHED_STATEMENTS = 128
+
+T = TypeVar("T")
+
+
+class ConnectionPool:
+    """
+    Pool thread-safe de connexions SQLite persistantes (mode WAL).
+    Chaque connexion garde ses requêtes préparées (cached_statements) ; elle est
+    prêtée à un seul appelant à la fois, qui y ouvre son propre curseur.
+    acquire() est bloquant : depuis du code async, passer par Connection.run().
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        size: int = SQLITE_POOL_SIZE,
+        timeout: float = SQLITE_POOL_TIMEOUT,
+    ):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Métriques
+        self._acquired = 0
+        self._waited = 0
+        self._timeouts = 0
+        self._max_wait = 0.0
+
+    def _open(self) -> sqlite3.Connection:
+        """
+        Ouvre une connexion configurée pour un usage multi-thread.
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=SQLITE_CACHED_STATEMENTS,
+        )
+        conn.row_factory = sqlite3.Row
+        # WAL : lectures concurrentes pendant une écriture
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Emprunte une connexion libre, en ouvre une tant que la taille le permet,
+        sinon attend au plus `timeout` secondes.
+        """
+        if self._closed:
+            raise RuntimeError("Pool SQLite fermé")
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if len(self._all) < self.size:
+                    conn = self._open()
+                    self._all.append(conn)
+
+            if conn is None:
+                start = time.monotonic()
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise TimeoutError(
+                        f"Aucune connexion SQLite libre après {self.timeout}s"
+                    )
+                wait = time.monotonic() - start
+                with self._lock:
+                    self._waited += 1
+                    self._max_wait = max(self._max_wait, wait)
+
+        with self._lock:
+            self._acquired += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """
+        Rend une connexion au pool (une transaction restée ouverte est annulée).
+        """
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def cursor(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Fournit un curseur propre à l'appelant sur une connexion empruntée.
+        Valide la transaction en sortie, l'annule en cas d'exception.
+        """
+        conn = self.acquire()
+        cur = conn.cursor()
+        try:
+            yield cur
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            self.release(conn)
+
+    def close(self) -> None:
+        """
+        Ferme toutes les connexions libres ; celles encore prêtées le seront à leur retour.
+        """
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._all.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les compteurs du pool.
+        """
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": len(self._all),
+                "idle": self._idle.qsize(),
+                "acquired": self._acquired,
+                "waited": self._waited,
+                "timeouts": self._timeouts,
+                "max_wait_ms": round(self._max_wait * 1000, 2),
+            }
 
 
 class Connection:
-    connexion = None
-    cursor = None
+    """
+    Accès à la base SQLite des utilisateurs via un pool de connexions partagé.
+    Utilise des class methods pour un accès singleton, comme Database.
+    """
+
+    _pool: Optional[ConnectionPool] = None
+    _pool_lock = threading.Lock()
 
     @classmethod
     def _get_db_path(cls):
@@ -54,43 +212,65 @@ class Connection:
         conn.close()
 
     @classmethod
-    def connect(cls):
-        if cls.connexion is None:
-            try:
-                db_dir, db_path = cls._get_db_path()
+    def get_pool(cls) -> ConnectionPool:
+        """
+        Retourne le pool partagé, créé (avec la base si besoin) au premier appel.
+        """
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    db_dir, db_path = cls._get_db_path()
+
+                    # Vérifier si la base de données existe, sinon la créer
+                    if not os.path.exists(db_path):
+                        print(f"Base de données non trouvée à {db_path}")
+                        print("Création de la base de données...")
+                        cls._create_database(db_path, db_dir)
 
-                # Vérifier si la base de données existe, sinon la créer
-                if not os.path.exists(db_path):
-                    print(f"Base de données non trouvée à {db_path}")
-                    print("Création de la base de données...")
-                    cls._create_database(db_path, db_dir)
+                    Connection._pool = ConnectionPool(db_path)
+                    print(
+                        f"Pool SQLite initialisé ({Connection._pool.size} connexions, WAL): {db_path}"
+                    )
+        return cls._pool
 
-                # Connexion à la base de données
-                cls.connexion = sqlite3.connect(db_path)
-                cls.connexion.row_factory = sqlite3.Row
+    @classmethod
+    @contextmanager
+    def cursor(cls) -> Iterator[sqlite3.Cursor]:
+        """
+        Curseur propre à l'appelant (une transaction) sur une connexion du pool.
+        """
+        with cls.get_pool().cursor() as cur:
+            yield cur
 
-                # Test de la connexion
-                cls.connexion.execute("SELECT 1").fetchone()
-                print(f"Base de données SQLite connectée: {db_path}")
+    @classmethod
+    async def run(cls, func: Callable[[sqlite3.Cursor], T]) -> T:
+        """
+        Exécute func(cur) dans un thread de travail : la connexion y est empruntée,
+        utilisée puis rendue, sans bloquer la boucle d'événements.
+        """
 
-            except sqlite3.Error as e:
-                print(f"Erreur BDD SQLite: {e}")
-                cls.connexion = None
-                raise
-            except Exception as e:
-                print(f"Erreur de connexion BDD SQLite: {e}")
-                cls.connexion = None
-                raise
+        def work() -> T:
+            with cls.cursor() as cur:
+                return func(cur)
+
+        return await run_in_threadpool(work)
 
-        if cls.cursor is None and cls.connexion is not None:
-            cls.cursor = cls.connexion.cursor()
+    @classmethod
+    def close_pool(cls):
+        """
+        Ferme le pool partagé (arrêt de l'application).
+        """
+        with cls._pool_lock:
+            pool = Connection._pool
+            Connection._pool = None
+        if pool is not None:
+            pool.close()
+            print("Pool SQLite fermé")
 
     @classmethod
-    def close(cls):
-        if cls.cursor is not None:
-            cls.cursor.close()
-            cls.cursor = None
-        if cls.connexion is not None:
-            cls.connexion.close()
-            cls.connexion = None
-            print("Connexion SQLite fermée")
+    def get_pool_stats(cls) -> Dict[str, Any]:
+        """
+        Retourne les compteurs du pool, ou un état vide s'il n'est pas encore créé.
+        """
+        pool = cls._pool
+        return pool.get_stats() if pool is not None else {"size": 0, "open": 0}
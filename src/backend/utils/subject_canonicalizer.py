@@ -0,0 +1,185 @@
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.text_normalization import normalize_text
+
+
+Token = Tuple[str, int]
+
+
+def _letter_tokens(counts: Counter) -> List[Token]:
+    """
+    Occurrences de lettres d'une forme normalisée : ("a", 1), ("a", 2)... pour "aa".
+    Deux formes ont autant de jetons communs que de lettres communes.
+    """
+    return [(letter, k) for letter, count in counts.items() for k in range(1, count + 1)]
+
+
+class SubjectCanonicalizer:
+    """
+    Rapproche un sujet du sujet connu le plus proche (correction des fautes de frappe).
+
+    Score identique à CSVQuestionProcessor.similarity, sur les formes normalisées :
+        0.5 * lettres communes / max(longueurs) + 0.5 * SequenceMatcher.ratio()
+    Le meilleur score l'emporte (le premier sujet connu en cas d'égalité) et n'est
+    retenu qu'au-delà du seuil.
+
+    Formes normalisées et comptes de lettres sont calculés une seule fois par sujet
+    connu. Les candidats sont filtrés par des bornes supérieures exactes du score, du
+    moins coûteux au plus coûteux, avant le calcul de SequenceMatcher :
+    - longueur : le score ne peut dépasser 0.5 * min/max + min/(somme des longueurs) ;
+    - index des occurrences de lettres (q-grammes de taille 1, par longueur) : pour
+      atteindre le seuil, un candidat doit partager au moins c lettres avec le sujet,
+      donc au moins une des (longueur - c + 1) occurrences les plus rares du sujet ;
+    - lettres communes exactes, puis borne quick_ratio du ratio de séquence.
+    """
+
+    def __init__(self, threshold: float = 0.90):
+        self.threshold = threshold
+        # Sujets connus dans l'ordre d'insertion : (sujet, forme normalisée, comptes de lettres)
+        self._subjects: List[Tuple[str, str, Counter]] = []
+        self._index: Dict[str, int] = {}
+        # Forme normalisée -> premier sujet connu ayant cette forme
+        self._by_norm: Dict[str, int] = {}
+        # Longueur normalisée -> occurrence de lettre -> rangs des sujets
+        self._postings: Dict[int, Dict[Token, List[int]]] = {}
+        # Nombre de sujets par occurrence de lettre (rareté)
+        self._token_counts: Counter = Counter()
+        # (longueur du sujet, longueur du candidat) -> lettres communes minimales
+        self._min_common_cache: Dict[Tuple[int, int], Optional[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._subjects)
+
+    def __contains__(self, subject: str) -> bool:
+        return subject in self._index
+
+    def add(self, subject: str) -> None:
+        """
+        Ajoute un sujet connu (sans effet s'il l'est déjà).
+        """
+        if not subject or subject in self._index:
+            return
+        rank = len(self._subjects)
+        norm = normalize_text(subject)
+        counts = Counter(norm)
+        self._subjects.append((subject, norm, counts))
+        self._index[subject] = rank
+        self._by_norm.setdefault(norm, rank)
+
+        tokens = _letter_tokens(counts)
+        by_token = self._postings.setdefault(len(norm), {})
+        for token in tokens:
+            by_token.setdefault(token, []).append(rank)
+        self._token_counts.update(tokens)
+
+    def update(self, subjects: Iterable[str]) -> None:
+        """
+        Ajoute plusieurs sujets connus, dans l'ordre donné.
+        """
+        for subject in subjects:
+            self.add(subject)
+
+    def copy(self) -> "SubjectCanonicalizer":
+        """
+        Copie indépendante de l'index (les ajouts à la copie ne modifient pas l'original),
+        sans renormaliser les sujets.
+        """
+        other = SubjectCanonicalizer(self.threshold)
+        other._subjects = list(self._subjects)
+        other._index = dict(self._index)
+        other._by_norm = dict(self._by_norm)
+        other._postings = {
+            length: {token: list(ranks) for token, ranks in by_token.items()}
+            for length, by_token in self._postings.items()
+        }
+        other._token_counts = Counter(self._token_counts)
+        other._min_common_cache = dict(self._min_common_cache)
+        return other
+
+    def _bound(self, common: int, la: int, lb: int) -> float:
+        """
+        Borne supérieure du score avec `common` lettres communes
+        (lettres exactes + quick_ratio, qui majore SequenceMatcher.ratio).
+        """
+        return 0.5 * (common / max(la, lb)) + 0.5 * (2.0 * common / (la + lb))
+
+    def _min_common(self, la: int, lb: int) -> Optional[int]:
+        """
+        Plus petit nombre de lettres communes permettant d'atteindre le seuil
+        (None si même min(la, lb) n'y suffit pas).
+        """
+        key = (la, lb)
+        if key not in self._min_common_cache:
+            common = min(la, lb)
+            if self._bound(common, la, lb) < self.threshold:
+                common = None
+            else:
+                while common > 0 and self._bound(common - 1, la, lb) >= self.threshold:
+                    common -= 1
+            self._min_common_cache[key] = common
+        return self._min_common_cache[key]
+
+    def canonicalize(self, subject: str) -> Tuple[str, bool]:
+        """
+        Retourne (sujet connu le plus proche, True) si son score atteint le seuil,
+        sinon (sujet, False).
+        """
+        if not subject or not self._subjects or subject in self._index:
+            return subject, False
+
+        na = normalize_text(subject)
+
+        # Même forme normalisée : score maximal (1.0), premier sujet connu
+        rank = self._by_norm.get(na)
+        if rank is not None:
+            if 1.0 >= self.threshold:
+                return self._subjects[rank][0], True
+            return subject, False
+        if not na:
+            return subject, False
+
+        la = len(na)
+        letters = Counter(na)
+        # Occurrences de lettres du sujet, les plus rares d'abord
+        tokens = sorted(_letter_tokens(letters), key=self._token_counts.__getitem__)
+
+        # Candidats : longueur compatible et assez d'occurrences rares en commun.
+        # Sur les `probe` occurrences les plus rares, un candidat doit en partager au
+        # moins needed - (la - probe), les autres ne pouvant fournir que la - probe lettres.
+        candidates = set()
+        for lb, by_token in self._postings.items():
+            needed = self._min_common(la, lb) if lb else None
+            if needed is None:
+                continue
+            # Un score nul n'est jamais retenu : au moins une lettre commune
+            needed = max(needed, 1)
+            probe = min(la, 2 * (la - needed + 1))
+            required = needed - (la - probe)
+            hits: Dict[int, int] = {}
+            for token in tokens[:probe]:
+                for rank in by_token.get(token, ()):
+                    hits[rank] = hits.get(rank, 0) + 1
+            candidates.update(rank for rank, hit in hits.items() if hit >= required)
+
+        best_rank: Optional[int] = None
+        best_score = 0.0
+        for rank in sorted(candidates):
+            _, nb, counts = self._subjects[rank]
+            lb = len(nb)
+            common = sum(min(count, counts[letter]) for letter, count in letters.items())
+            bound = self._bound(common, la, lb)
+            # En cas d'égalité, le sujet de rang inférieur (déjà vu) l'emporte
+            if bound < self.threshold or bound <= best_score:
+                continue
+            score = 0.5 * (common / max(la, lb)) + 0.5 * SequenceMatcher(
+                None, na, nb
+            ).ratio()
+            if score > best_score:
+                best_score = score
+                best_rank = rank
+
+        if best_rank is not None and best_score >= self.threshold:
+            return self._subjects[best_rank][0], True
+        return subject, False
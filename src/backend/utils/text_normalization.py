@@ -0,0 +1,48 @@
+import unicodedata
+from typing import Iterable, List, Set
+
+NGRAM_SIZE = 3
+
+
+def normalize_text(s: str) -> str:
+    """
+    Normalise un texte pour la comparaison : minuscules, sans accents,
+    uniquement les caractères alphanumériques.
+    """
+    if not s:
+        return ""
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return "".join(ch for ch in s.lower() if ch.isalnum())
+
+
+def text_ngrams(s: str, n: int = NGRAM_SIZE) -> Set[str]:
+    """
+    Retourne l'ensemble des n-grammes d'un texte déjà normalisé.
+    """
+    return {s[i : i + n] for i in range(len(s) - n + 1)}
+
+
+def normalize_subjects(subjects: Iterable[str]) -> List[str]:
+    """
+    Normalise une liste de sujets (sans doublons ni valeurs vides, ordre conservé).
+    """
+    normalized: List[str] = []
+    for subject in subjects or []:
+        value = normalize_text(subject) if isinstance(subject, str) else ""
+        if value and value not in normalized:
+            normalized.append(value)
+    return normalized
+
+
+def subject_search_fields(subjects: Iterable[str]) -> dict:
+    """
+    Champs de recherche dérivés des sujets, stockés avec chaque question :
+    - subject_norm : sujets normalisés (recherche par préfixe sur index)
+    - subject_ngrams : n-grammes des sujets normalisés (recherche par sous-chaîne)
+    """
+    subject_norm = normalize_subjects(subjects)
+    ngrams: Set[str] = set()
+    for value in subject_norm:
+        ngrams |= text_ngrams(value)
+    return {"subject_norm": subject_norm, "subject_ngrams": sorted(ngrams)}
@@ -2,7 +2,7 @@ from pathlib import Path
 from flask import Flask, jsonify, redirect, render_template, request, session, url_for
 from werkzeug.exceptions import HTTPException
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import os
 from dotenv import load_dotenv
 
@@ -87,6 +87,25 @@ class APIClient:
             print(f"❌ Erreur API get_user_name: {e}")
             return "Inconnu"
 
+    @staticmethod
+    def get_user_names(user_ids: List[int], token: str) -> Optional[Dict[str, str]]:
+        """Récupère les noms de plusieurs utilisateurs via l'API (une requête).
+        Retourne None si l'API n'a pas répondu (à distinguer des IDs inconnus)"""
+        try:
+            response = requests.post(
+                f"{API_BASE_URL}/api/auth/users/names",
+                json={"ids": user_ids},
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=5,
+            )
+            if response.status_code == 200:
+                return response.json().get("names", {})
+            print(f"❌ Erreur API get_user_names: HTTP {response.status_code}")
+            return None
+        except requests.RequestException as e:
+            print(f"❌ Erreur API get_user_names: {e}")
+            return None
+
 
 # ==================== DECORATORS ====================
 
@@ -296,6 +315,27 @@ def get_user_name(user_id):
     return jsonify({"userName": user_name})
 
 
+@app.post("/api/users/names")
+def get_user_names():
+    """Récupère les noms de plusieurs utilisateurs via l'API"""
+    if "token" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    payload = request.get_json(silent=True) or {}
+    try:
+        user_ids = sorted({int(i) for i in payload.get("ids", [])})
+    except (TypeError, ValueError):
+        return jsonify({"error": "IDs invalides"}), 400
+
+    if not user_ids:
+        return jsonify({"names": {}})
+
+    names = APIClient.get_user_names(user_ids, session["token"])
+    if names is None:
+        return jsonify({"error": "Noms des utilisateurs indisponibles"}), 502
+    return jsonify({"names": names})
+
+
 @app.route("/logout")
 def logout():
     """Déconnecte l'utilisateur"""
@@ -104,7 +104,7 @@ export class QRApiService {
    * @returns {Promise<Array>} La liste des questionnaires
    */
   async fetchQuestionnaires () {
-    const url = `${this.config.apiUrl}/questionnaires`
+    const url = `${this.config.apiUrl}/questionnaires?include=creator`
     return this.fetchJSON(url)
   }
 
@@ -137,6 +137,14 @@ export class QuestionnaireManager extends BaseManager {
     if (!tbody) return
     tbody.innerHTML = ''
 
+    // Noms déjà résolus par l'API (include=creator)
+    list.forEach(q => {
+      if (q.created_by_name) {
+        this.userNameCache.set(q.created_by, q.created_by_name)
+      }
+    })
+    await this.prefetchUserNames(list.map(q => q.created_by))
+
     for (const q of list) {
       const latestDate = this.getLatestDate(
         q.created_at,
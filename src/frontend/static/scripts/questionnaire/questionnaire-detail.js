@@ -8,6 +8,8 @@ class QuestionnaireDetail {
     this.questionnaireId = this.config.questionnaireId
     this.currentQuestionnaire = null
     this.draftQuestions = []
+    // Détails complets des questions affichées, chargés en une requête batch
+    this.questionDetails = new Map()
     this.hasUnsavedChanges = false
     this.canEdit = false
 
@@ -140,6 +142,10 @@ class QuestionnaireDetail {
       this.updateHeader(questionnaire)
       await this.renderTable(this.draftQuestions)
       this.updateActionButtons()
+
+      // Détails de toutes les questions affichées : une seule requête, sans bloquer
+      this.questionDetails = new Map()
+      this.prefetchQuestionDetails(this.draftQuestions.map(q => q.id))
     } catch (error) {
       console.error('Erreur lors du chargement des détails:', error)
       this.showError('Impossible de charger les détails du questionnaire')
@@ -324,6 +330,20 @@ class QuestionnaireDetail {
     }
   }
 
+  async prefetchQuestionDetails (questionIds) {
+    const missing = [...new Set(questionIds)].filter(
+      id => id && !this.questionDetails.has(id)
+    )
+    if (!missing.length) return
+
+    try {
+      const fetched = await this.apiService.fetchQuestionsBatch(missing)
+      fetched.forEach(q => this.questionDetails.set(q.id, q))
+    } catch (error) {
+      console.warn('Erreur récupération des détails des questions:', error)
+    }
+  }
+
   async fetchQuestionDetails (questionId) {
     // Essayer de récupérer depuis le tableau des questions si disponible
     if (window.tableManager) {
@@ -332,22 +352,15 @@ class QuestionnaireDetail {
       if (found) return found
     }
 
-    // Sinon, faire une requête API
-    const response = await fetch(
-      `${this.config.apiUrl}/question/${questionId}`,
-      {
-        headers: {
-          Authorization: `Bearer ${this.config.token}`,
-          Accept: 'application/json'
-        }
-      }
-    )
-
-    if (!response.ok) {
-      throw new Error('Question non trouvée')
+    // Puis parmi les détails déjà chargés pour le questionnaire
+    if (this.questionDetails.has(questionId)) {
+      return this.questionDetails.get(questionId)
     }
 
-    return response.json()
+    // Sinon, une requête GET (réponse mise en cache avec ETag côté API)
+    const question = await this.apiService.fetchQuestion(questionId)
+    this.questionDetails.set(question.id, question)
+    return question
   }
 
   updateActionButtons () {
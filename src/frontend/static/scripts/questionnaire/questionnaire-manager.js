@@ -4,6 +4,7 @@ import { ApiService as QRApiService } from '../utils/api-service.js'
 import { SelectManager } from '../utils/select-manager.js'
 import { QuestionnaireFormValidator } from '../utils/form-validator.js'
 import { QuestionnaireModalManager } from './questionnaire-modale-manager.js'
+import { prefetchUserNames } from '../utils/managers-utils.js'
 
 export class QuestionnaireManager {
   constructor () {
@@ -213,6 +214,14 @@ export class QuestionnaireManager {
 
     const toText = v => (Array.isArray(v) ? v.join(', ') : v ?? '')
 
+    // Noms déjà résolus par l'API (include=creator)
+    list.forEach(q => {
+      if (q.created_by_name) {
+        this.userNameCache.set(q.created_by, q.created_by_name)
+      }
+    })
+    await this.prefetchUserNames(list.map(q => q.created_by))
+
     for (const q of list) {
       const latestDate = this.getLatestDate(q)
       const tr = document.createElement('tr')
@@ -245,6 +254,10 @@ export class QuestionnaireManager {
     }
   }
 
+  async prefetchUserNames (userIds) {
+    return prefetchUserNames(this.userNameCache, userIds)
+  }
+
   async getUserNameFromCache (userId) {
     if (this.userNameCache.has(userId)) {
       return this.userNameCache.get(userId)
@@ -4,6 +4,18 @@ class TableManager {
     this.elements = this.getElements()
     this.fullData = []
     this.userNameCache = new Map()
+    this.pageSize = 500
+    // Colonnes rendues par le tableau (+ status pour l'action "Ajouter au quizz")
+    this.fields = [
+      'id',
+      'question',
+      'subject',
+      'use',
+      'status',
+      'created_by',
+      'created_at',
+      'edited_at'
+    ]
 
     // Gestion générique des filtres
     this.filters = {
@@ -166,6 +178,14 @@ class TableManager {
     }
   }
 
+  async prefetchUserNames (userIds) {
+    // Script classique : utilitaire partagé des managers chargé à la demande
+    const { prefetchUserNames } = await import(
+      '/static/scripts/utils/managers-utils.js'
+    )
+    return prefetchUserNames(this.userNameCache, userIds)
+  }
+
   async getUserNameFromCache (userId) {
     if (this.userNameCache.has(userId)) {
       return this.userNameCache.get(userId)
@@ -314,6 +334,14 @@ class TableManager {
 
     this.elements.tbody.innerHTML = ''
 
+    // Noms déjà résolus par l'API (include=creator)
+    data.forEach(item => {
+      if (item.created_by_name) {
+        this.userNameCache.set(item.created_by, item.created_by_name)
+      }
+    })
+    await this.prefetchUserNames(data.map(item => item.created_by))
+
     for (const item of data) {
       const tr = document.createElement('tr')
       const creatorName = await this.getUserNameFromCache(item.created_by)
@@ -368,20 +396,39 @@ class TableManager {
     this.showMessage('Chargement…')
 
     try {
-      const response = await fetch(`${this.config.apiUrl}/questions`, {
-        method: 'GET',
-        headers: {
-          Authorization: `Bearer ${this.config.token}`,
-          Accept: 'application/json'
+      // Chargement page par page (pagination par clé), colonnes affichées uniquement
+      const data = []
+      let after = null
+
+      do {
+        const params = new URLSearchParams({
+          limit: String(this.pageSize),
+          fields: this.fields.join(','),
+          include: 'creator'
+        })
+        if (after) params.set('after', after)
+
+        const response = await fetch(
+          `${this.config.apiUrl}/questions?${params}`,
+          {
+            method: 'GET',
+            headers: {
+              Authorization: `Bearer ${this.config.token}`,
+              Accept: 'application/json'
+            }
+          }
+        )
+
+        if (!response.ok) {
+          throw new Error(`Erreur HTTP ${response.status}`)
         }
-      })
 
-      if (!response.ok) {
-        throw new Error(`Erreur HTTP ${response.status}`)
-      }
+        const page = await response.json()
+        if (Array.isArray(page)) data.push(...page)
+        after = response.headers.get('X-Next-After')
+      } while (after)
 
-      const data = await response.json()
-      this.fullData = Array.isArray(data) ? data : []
+      this.fullData = data
 
       this.applyFilters()
 
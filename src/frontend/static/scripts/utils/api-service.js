@@ -54,6 +54,24 @@ export class ApiService {
     return this.normalizeData(data)
   }
 
+  async fetchQuestionsBatch (ids) {
+    // L'API accepte au plus 200 ids par requête
+    const url = `${this.config.apiUrl}/questions/batch`
+    const chunks = []
+    for (let i = 0; i < ids.length; i += 200) {
+      chunks.push(ids.slice(i, i + 200))
+    }
+    const results = await Promise.all(
+      chunks.map(chunk =>
+        this.fetchJSON(url, {
+          method: 'POST',
+          body: JSON.stringify({ ids: chunk })
+        })
+      )
+    )
+    return results.flat().map(item => this.normalizeData(item))
+  }
+
   async updateQuestion (id, payload) {
     const url = `${this.config.apiUrl}/question/${encodeURIComponent(id)}`
     return this.fetchJSON(url, {
@@ -82,7 +100,7 @@ export class ApiService {
   }
 
   async fetchQuestionnaires () {
-    const url = `${this.config.apiUrl}/questionnaires`
+    const url = `${this.config.apiUrl}/questionnaires?include=creator`
     return this.fetchJSON(url)
   }
 
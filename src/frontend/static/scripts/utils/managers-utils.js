@@ -1,5 +1,47 @@
 // common-manager-utils.js - Utilitaires partagés entre managers
 
+// Nombre maximal d'IDs par requête de noms (limite de l'API)
+const USER_NAMES_BATCH_SIZE = 1000
+
+/**
+ * Récupère les noms absents du cache (une requête par lot de 1000 IDs).
+ * Seuls les noms renvoyés par le serveur sont mis en cache : en cas d'échec ou
+ * d'ID inconnu, le nom sera redemandé individuellement (getUserNameFromCache).
+ */
+export async function prefetchUserNames (userNameCache, userIds) {
+  const missing = [...new Set(userIds)].filter(
+    id => id != null && id !== '' && !userNameCache.has(id)
+  )
+
+  const batches = []
+  for (let i = 0; i < missing.length; i += USER_NAMES_BATCH_SIZE) {
+    batches.push(missing.slice(i, i + USER_NAMES_BATCH_SIZE))
+  }
+
+  await Promise.all(
+    batches.map(async ids => {
+      try {
+        const response = await fetch('/api/users/names', {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ ids })
+        })
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`)
+        }
+        const result = await response.json()
+        const names = result.names || {}
+        ids.forEach(id => {
+          const name = names[String(id)]
+          if (name != null) userNameCache.set(id, name)
+        })
+      } catch (error) {
+        console.warn('Erreur récupération des noms utilisateurs:', error)
+      }
+    })
+  )
+}
+
 /**
  * Classe de base pour les managers avec fonctionnalités communes
  */
@@ -38,6 +80,13 @@ export class BaseManager {
     }
   }
 
+  /**
+   * Récupère en une requête les noms absents du cache
+   */
+  async prefetchUserNames (userIds) {
+    return prefetchUserNames(this.userNameCache, userIds)
+  }
+
   /**
    * Récupère le nom d'utilisateur avec cache
    */